@@ -16,16 +16,33 @@ def country_to_continent(country_name):
     )
     return country_continent_name
 
-df = (
-    # pl.scan_csv produces a lazy frame
+# pl.scan_csv produces a lazy frame
+lf_results = (
     pl.scan_csv('NYC Marathon Results, 2024 - Marathon Runner Results.csv')
     .select(pl.col(['age', 'gender', 'countryCode', 'pace']))
-    .with_columns(
-        CONTINENT = pl.col('countryCode')
-            .map_elements(
-                lambda x: country_to_continent(x),return_dtype=pl.String
-                )
-    )
+)
+
+# continent lookup table, built with one country_to_continent call per unique
+# country code instead of one per runner, then joined to the results
+country_codes = (
+    lf_results
+    .select(pl.col('countryCode').unique())
+    .collect()
+    ['countryCode']
+    .drop_nulls()
+    .to_list()
+)
+df_continents = pl.DataFrame(
+    {
+        'countryCode': country_codes,
+        'CONTINENT': [country_to_continent(c) for c in country_codes],
+    },
+    schema={'countryCode': pl.String, 'CONTINENT': pl.String},
+)
+
+df = (
+    lf_results
+    .join(df_continents.lazy(), on='countryCode', how='left')
     .drop_nulls('CONTINENT')
     .with_columns(
         AGE_GROUP = (pl.col('age')/10).cast(pl.UInt16).cast(pl.String) +'0s'
@@ -29,25 +29,28 @@ df = (
     .collect()
 )
 
-publisher_list = sorted(list(set(df['publisher'])))
-for publisher_index, publisher in enumerate(sorted(publisher_list),start=1):
-    publisher_titles = (
-        df.filter(pl.col('publisher') == publisher)
-        .unique('title')
-        .sort('title')
-        ['title']
-        .to_list()
-    )
+#-------------------------------------------------------------------------------
+#   One pass over the data: date-sorted rank series of every title, keyed by
+#   (publisher, title), and the list of titles for each publisher
+#-------------------------------------------------------------------------------
+title_series = (
+    df
+    .select(pl.col('publisher', 'title', 'rank', 'bestsellers_date'))
+    .sort('bestsellers_date')
+    .partition_by(['publisher', 'title'], as_dict=True, include_key=False)
+)
+publisher_titles = {}
+for publisher, title in title_series:
+    publisher_titles.setdefault(publisher, []).append(title)
+
+my_colors = px.colors.qualitative.Alphabet
+my_color_count = len(my_colors)
+
+def get_publisher_traces(publisher):
+    ''' return one scatter trace per title, from the precomputed series '''
     trace_list = []
-    my_colors = px.colors.qualitative.Alphabet
-    my_color_count = len(my_colors)
-    fig = go.Figure()
-    for color_index, title in enumerate(sorted(publisher_titles)):
-        df_title = (
-            df
-            .filter(pl.col('title') == title)
-            .select(pl.col('rank', 'bestsellers_date'))
-        )
+    for color_index, title in enumerate(sorted(publisher_titles[publisher])):
+        df_title = title_series[(publisher, title)]
         trace = go.Scatter(
             x=df_title['bestsellers_date'],
             y=df_title['rank'],
@@ -58,7 +61,12 @@ for publisher_index, publisher in enumerate(sorted(publisher_list),start=1):
             line_shape='spline',
             connectgaps=False
         )
-        fig.add_trace(trace)
+        trace_list.append(trace)
+    return trace_list
+
+publisher_list = sorted(publisher_titles)
+for publisher_index, publisher in enumerate(publisher_list,start=1):
+    fig = go.Figure(get_publisher_traces(publisher))
     fig.update_layout(
         template='simple_white', 
         height=400, width=800,
@@ -1,7 +1,7 @@
 from dash import Dash, dcc, html, Input, Output
 import dash_bootstrap_components as dbc
-import polars as pl
 import plotly.graph_objects as go
+from grocery_data import category_list, category_means, nutrient_list
 # Download CSV sheet at: 
 # https://drive.google.com/file/d/1EoFTpSJOIYmVzemoMLj7vMTqeM1zMy0o/view?usp=sharing
 
@@ -18,50 +18,21 @@ style_space = {
     'background': 'linear-gradient(to right, #007bff, #ff7b00)', 
     'margin': '10px 0'
     }
-df=pl.read_csv('GroceryDB_foods.csv')
-df_filtered = (
-    df
-    .rename({col: col.upper() for col in df.columns})
-    .with_columns(
-       CATEGORY=pl.col('HARMONIZED SINGLE CATEGORY')
-        .str.to_titlecase()
-        .str.replace_all('-', ' ')
-        .str.replace('Milk Milk Substitute', 'Milk or Substitute'),
-      FAT_TOTAL=pl.col('TOTAL FAT'),  #.series.log10(),
-      CARBS=pl.col('CARBOHYDRATE'),
-      SUGAR_TOTAL=pl.col('SUGARS, TOTAL'),
-      DIETARY_FIBER=pl.col('FIBER, TOTAL DIETARY'),
-      SAT_FATTY_ACIDS_TOT=pl.col('FATTY ACIDS, TOTAL SATURATED'),
-      VITAMIN_A=pl.col('TOTAL VITAMIN A'),  
-      VITAMIN_C=pl.col('VITAMIN C'),   
-    )
-    .select(   
-      'CATEGORY', 'CALCIUM', 'CARBS',  'CHOLESTEROL', 'DIETARY_FIBER', 
-      'FAT_TOTAL', 'IRON', 'PROTEIN', 'SAT_FATTY_ACIDS_TOT', 'SODIUM', 
-      'SUGAR_TOTAL', 'VITAMIN_A', 'VITAMIN_C'     
-    )
-    .group_by('CATEGORY', maintain_order=True)
-    .mean()
-)
-# these lists will be used as callback choices
-category_list = sorted(df_filtered['CATEGORY'].unique().to_list())
+# category means are precomputed by grocery_data, shared with
+# Week_13_Alex_Brilliant.py. These lists will be used as callback choices
 category_defaults = [
     'Drink Shakes Other', 'Drink Juice', 'Drink Tea', 'Drink Soft Energy Mixes']
-nutrition_list = sorted([c for c in df_filtered.columns if c!= 'CATEGORY'])
+nutrition_list = nutrient_list
 nutrient_defaults = ['DIETARY_FIBER', 'SAT_FATTY_ACIDS_TOT']
 
 #----- DEFINE FUNCTIONS---------------------------------------------------------
-def make_fig(df_filtered, selected_cats, selected_nutrients):
-    df_selected = (
-        df_filtered
-        .filter(pl.col('CATEGORY').is_in(selected_cats))
-        .select(['CATEGORY'] + selected_nutrients)
-    )
+def make_fig(selected_cats, selected_nutrients):
+    selected_cats = [c for c in selected_cats if c in category_means]
     fig = go.Figure()
     for nutrient in selected_nutrients:
         fig.add_trace(go.Scatterpolar(
-            r=df_selected[nutrient],
-            theta=df_selected['CATEGORY'],
+            r=[category_means[c][nutrient] for c in selected_cats],
+            theta=selected_cats,
             fill='toself',
             name=nutrient,
         ))
@@ -152,7 +123,7 @@ def update_dashboard(selected_cats, selected_nutrients):
         selected_cats = [selected_cats]
     if not type(selected_nutrients) is list:
         selected_nutrients = [selected_nutrients]
-    scatter_polar = make_fig(df_filtered, selected_cats, selected_nutrients)
+    scatter_polar = make_fig(selected_cats, selected_nutrients)
     return scatter_polar
 
 #----- RUN THE APP -------------------------------------------------------------
@@ -1,31 +1,65 @@
 from dash import Dash, html, dcc, Input, Output, State
 import dash_bootstrap_components as dbc
-import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import MinMaxScaler
+from sklearn.preprocessing import MinMaxScaler, normalize
 import plotly.graph_objects as go
 import plotly.express as px
 import numpy as np
+import hashlib
+import os
+from grocery_data import df_products, nutrient_labels
 
 # Initialize the Dash app with a modern Bootstrap theme
 # Add suppress_callback_exceptions=True to avoid errors with dynamic components
 app = Dash(__name__, external_stylesheets=[dbc.themes.UNITED], suppress_callback_exceptions=True)
 
-# Load the GroceryDB_foods dataset and remove rows with NaN
-df = pd.read_csv("GroceryDB_foods.csv").dropna()
-
-df = df.reset_index(drop=True)
-
-# Select relevant columns
-nutritional_columns = [
-    'Protein', 'Total Fat', 'Carbohydrate', 'Sugars, total',
-    'Fiber, total dietary', 'Calcium', 'Iron', 'Sodium', 'Vitamin C',
-    'Cholesterol', 'Fatty acids, total saturated', 'Total Vitamin A'
-]
-
-# Scale the dataset
-scaler = MinMaxScaler()
-df_scaled = pd.DataFrame(scaler.fit_transform(df[nutritional_columns]), columns=nutritional_columns)
+# GroceryDB_foods products with complete data, from the shared typed data
+# layer in grocery_data.py (also used by Plotly_FF_2025_13.py)
+df = df_products
+
+# Select relevant columns: short names in the data, dataset labels for display
+nutrient_keys = list(nutrient_labels)
+nutritional_columns = list(nutrient_labels.values())
+
+# Nearest-neighbour index: the top-k most similar products for every product,
+# computed once with a blocked matrix multiply so the full similarity matrix
+# is never held in memory. Saved as memory-mapped .npy files keyed by a hash
+# of the nutrient data, so later starts just map the files.
+K_NEIGHBORS = 7  # the product itself plus 6 recommendations
+BLOCK_SIZE = 1024
+
+def build_neighbor_index(features, index_path, sim_path):
+    scaled = MinMaxScaler().fit_transform(features)
+    unit = normalize(scaled)  # cosine similarity is the dot product of unit rows
+    n_rows = unit.shape[0]
+    k = min(K_NEIGHBORS, n_rows)
+    nn_index = np.lib.format.open_memmap(index_path, mode='w+', dtype=np.int32, shape=(n_rows, k))
+    nn_sim = np.lib.format.open_memmap(sim_path, mode='w+', dtype=np.float32, shape=(n_rows, k))
+    for start in range(0, n_rows, BLOCK_SIZE):
+        stop = min(start + BLOCK_SIZE, n_rows)
+        sims = unit[start:stop] @ unit.T
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1, kind='stable')
+        nn_index[start:stop] = np.take_along_axis(top, order, axis=1)
+        nn_sim[start:stop] = np.take_along_axis(top_sims, order, axis=1)
+    nn_index.flush()
+    nn_sim.flush()
+
+def load_neighbor_index(features):
+    features = np.ascontiguousarray(features)
+    digest = hashlib.sha1(features.tobytes()).hexdigest()[:12]
+    index_path = f'nn_index_{digest}.npy'
+    sim_path = f'nn_similarity_{digest}.npy'
+    if not (os.path.exists(index_path) and os.path.exists(sim_path)):
+        print('building nearest-neighbour index')
+        for file_name in os.listdir('.'):  # remove index files of older data
+            if file_name.startswith(('nn_index_', 'nn_similarity_')) and \
+                    file_name.endswith('.npy'):
+                os.remove(file_name)
+        build_neighbor_index(features, index_path, sim_path)
+    return np.load(index_path, mmap_mode='r'), np.load(sim_path, mmap_mode='r')
+
+nn_index, nn_similarity = load_neighbor_index(df.select(nutrient_keys).to_numpy())
 
 # Custom style for the entire application
 CONTENT_STYLE = {
@@ -87,7 +121,7 @@ app.layout = dbc.Container([
         dbc.ModalBody([
             dcc.Dropdown(
                 id="product-dropdown",
-                options=[{"label": row['name'], "value": idx} for idx, row in df.iterrows()],
+                options=[{"label": name, "value": idx} for idx, name in enumerate(df['NAME'])],
                 placeholder="Search and select product...",
                 className="mb-4",
                 style={"fontSize": "14px"}  
@@ -214,8 +248,8 @@ def display_selected_product(product_id):
     if product_id is None:
         return "No product selected"
     try:
-        product = df.loc[int(product_id)]
-        return f"Selected product: {product['name']}"
+        product = df.row(int(product_id), named=True)
+        return f"Selected product: {product['NAME']}"
     except Exception:
         return "Error loading product"
 
@@ -236,15 +270,17 @@ def update_recommendations(product_id):
 
     try:
         # Details of the selected product
-        product = df.loc[int(product_id)]
-
-        # Create nutritional information table
-        nutrients_values = {
-            'Nutrient': nutritional_columns,
-            'Value': [round(product[col], 2) for col in nutritional_columns]
-        }
-        nutritional_table = dbc.Table.from_dataframe(
-            pd.DataFrame(nutrients_values),
+        product = df.row(int(product_id), named=True)
+
+        # Create nutritional information table from the polars row
+        nutritional_table = dbc.Table(
+            [
+                html.Thead(html.Tr([html.Th('Nutrient'), html.Th('Value')])),
+                html.Tbody([
+                    html.Tr([html.Td(label), html.Td(round(product[col], 2))])
+                    for label, col in zip(nutritional_columns, nutrient_keys)
+                ]),
+            ],
             striped=True,
             bordered=False,
             hover=True,
@@ -254,11 +290,11 @@ def update_recommendations(product_id):
 
         details = html.Div([
             html.Div([
-                html.H6(product['name'], className="mb-2"),
-                html.P(f"Brand: {product['brand']}", className="mb-1 fs-5"),
+                html.H6(product['NAME'], className="mb-2"),
+                html.P(f"Brand: {product['BRAND']}", className="mb-1 fs-5"),
                 html.P([
                     html.Span("Price: ", className="fw-bold"),
-                    html.Span(f"US${product['price']:.2f}", className="text-primary fs-4")
+                    html.Span(f"US${product['PRICE']:.2f}", className="text-primary fs-4")
                 ], className="mb-3"),
             ]),
             html.Hr(),
@@ -270,13 +306,13 @@ def update_recommendations(product_id):
         unmet_criteria = 0
         criteria_text = []
 
-        if product['Total Fat'] > 20:
+        if product['FAT_TOTAL'] > 20:
             unmet_criteria += 1
             criteria_text.append("high in fats")
-        if product['Sugars, total'] > 15:
+        if product['SUGAR_TOTAL'] > 15:
             unmet_criteria += 1
             criteria_text.append("high in sugars")
-        if product['Sodium'] > 500:
+        if product['SODIUM'] > 500:
             unmet_criteria += 1
             criteria_text.append("high in sodium")
 
@@ -303,22 +339,21 @@ def update_recommendations(product_id):
             html.Span(alert_message)
         ], color=alert_color, className="mt-3")
 
-        # Calculate similarities for recommendations
-        reference_product = df_scaled.iloc[[int(product_id)]]
-        similarities = cosine_similarity(reference_product, df_scaled)
-        df_temp = df.copy()
-        df_temp['similarity'] = similarities[0]
-
-       
-        recommended = df_temp.sort_values(by='similarity', ascending=False).iloc[1:7]  # Show 6 recommendations
+        # Look up recommendations in the precomputed nearest-neighbour index
+        neighbors = nn_index[int(product_id)][1:K_NEIGHBORS]  # Show 6 recommendations
+        similarities = nn_similarity[int(product_id)][1:K_NEIGHBORS]
+        recommended = [
+            {**df.row(int(idx), named=True), 'similarity': float(sim)}
+            for idx, sim in zip(neighbors, similarities)
+        ]
 
         cards = []
-        for idx, row in recommended.iterrows():
+        for row in recommended:
             # Evaluate conditions for this recommended product
             unmet_conditions = 0
-            if row['Total Fat'] > 20: unmet_conditions += 1
-            if row['Sugars, total'] > 15: unmet_conditions += 1
-            if row['Sodium'] > 500: unmet_conditions += 1
+            if row['FAT_TOTAL'] > 20: unmet_conditions += 1
+            if row['SUGAR_TOTAL'] > 15: unmet_conditions += 1
+            if row['SODIUM'] > 500: unmet_conditions += 1
 
             # Determine card border color based on nutritional profile
             if unmet_conditions == 0:
@@ -342,12 +377,12 @@ def update_recommendations(product_id):
                         ])
                     ], className=f"border-{border_color}"),
                     dbc.CardBody([
-                        html.H6(row['name'], className="card-title text-truncate",
-                                title=row['name']),
-                        html.P(f"Brand: {row['brand']}", className="card-text"),
+                        html.H6(row['NAME'], className="card-title text-truncate",
+                                title=row['NAME']),
+                        html.P(f"Brand: {row['BRAND']}", className="card-text"),
                         html.Div([
                             html.Span("US$", className="text-muted me-1"),
-                            html.Span(f"{row['price']:.2f}", className="fw-bold fs-5")
+                            html.Span(f"{row['PRICE']:.2f}", className="fw-bold fs-5")
                         ], className="mt-2")
                     ])
                 ], className=f"h-100 shadow-sm border-{border_color}")
@@ -359,22 +394,22 @@ def update_recommendations(product_id):
 
         # Add selected product with thicker line
         fig.add_trace(go.Scatterpolar(
-            r=[product[col] for col in nutritional_columns],
+            r=[product[col] for col in nutrient_keys],
             theta=nutritional_columns,
             fill='toself',
-            name=product['name'],
+            name=product['NAME'],
             line=dict(color=radar_colors[0], width=3),
             fillcolor=transparent_radar_colors[0]  # Use RGBA color with transparency
         ))
         # Add all recommended products to the chart (limiting to available colors)
         max_products = min(len(recommended), len(radar_colors) - 1)  # -1 because we already used the first color
-        for i, (_, row) in enumerate(recommended.iloc[:max_products].iterrows()):
+        for i, row in enumerate(recommended[:max_products]):
             if i < len(radar_colors) - 1:  # Make sure we don't exceed available colors
                 fig.add_trace(go.Scatterpolar(
-                    r=[row[col] for col in nutritional_columns],
+                    r=[row[col] for col in nutrient_keys],
                     theta=nutritional_columns,
                     fill='toself',
-                    name=row['name'],
+                    name=row['NAME'],
                     line=dict(color=radar_colors[i + 1]),
                     fillcolor=transparent_radar_colors[i + 1]  # Use RGBA color with transparency
                 ))
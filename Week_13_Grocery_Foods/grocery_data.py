@@ -0,0 +1,70 @@
+import os
+import polars as pl
+# Shared data layer for the Week 13 grocery dashboards, Plotly_FF_2025_13.py
+# and Week_13_Alex_Brilliant.py. The CSV is parsed once into a parquet cache
+# holding only the columns the dashboards use, with nutrients as Float32 and
+# CATEGORY as Categorical. Category x nutrient means are computed at import.
+# Download CSV sheet at:
+# https://drive.google.com/file/d/1EoFTpSJOIYmVzemoMLj7vMTqeM1zMy0o/view?usp=sharing
+
+#----- GLOBALS -----------------------------------------------------------------
+# short column names used by the dashboards, with the dataset's own labels
+nutrient_labels = {
+    'PROTEIN': 'Protein',
+    'FAT_TOTAL': 'Total Fat',
+    'CARBS': 'Carbohydrate',
+    'SUGAR_TOTAL': 'Sugars, total',
+    'DIETARY_FIBER': 'Fiber, total dietary',
+    'CALCIUM': 'Calcium',
+    'IRON': 'Iron',
+    'SODIUM': 'Sodium',
+    'VITAMIN_C': 'Vitamin C',
+    'CHOLESTEROL': 'Cholesterol',
+    'SAT_FATTY_ACIDS_TOT': 'Fatty acids, total saturated',
+    'VITAMIN_A': 'Total Vitamin A',
+}
+nutrient_list = sorted(nutrient_labels)
+
+#----- READ & CLEAN DATASET ----------------------------------------------------
+if 'GroceryDB_foods.parquet' in os.listdir('.'):
+    print('reading dataset from parquet file')
+    df_foods = pl.read_parquet('GroceryDB_foods.parquet')
+else:
+    print('reading dataset from csv file')
+    df_foods = (
+        pl.scan_csv('GroceryDB_foods.csv')
+        .rename(lambda col: col.upper())
+        .select(
+            NAME = pl.col('NAME'),
+            BRAND = pl.col('BRAND'),
+            PRICE = pl.col('PRICE').cast(pl.Float32),
+            CATEGORY = pl.col('HARMONIZED SINGLE CATEGORY')
+                .str.to_titlecase()
+                .str.replace_all('-', ' ')
+                .str.replace('Milk Milk Substitute', 'Milk or Substitute')
+                .cast(pl.Categorical),
+            **{
+                short_name: pl.col(label.upper()).cast(pl.Float32)
+                for short_name, label in nutrient_labels.items()
+            },
+        )
+        .collect()
+    )
+    df_foods.write_parquet('GroceryDB_foods.parquet')
+
+#----- PRECOMPUTED AGGREGATES --------------------------------------------------
+df_category_means = (
+    df_foods
+    .group_by('CATEGORY', maintain_order=True)
+    .agg(pl.col(nutrient_list).mean())
+    .with_columns(pl.col('CATEGORY').cast(pl.String))
+)
+category_list = sorted(df_category_means['CATEGORY'].to_list())
+
+# {category: {nutrient: mean}}, callbacks read this instead of filtering
+category_means = {
+    row['CATEGORY']: row for row in df_category_means.iter_rows(named=True)
+}
+
+# products with complete data, used by the recommender
+df_products = df_foods.drop_nulls(['NAME', 'BRAND', 'PRICE'] + nutrient_list)
@@ -1,6 +1,6 @@
 import polars as pl
 import plotly.express as px
-from dash import Dash, dcc, html, Input, Output
+from dash import Dash, dcc, html, Input, Output, ctx, no_update
 import dash_bootstrap_components as dbc
 import dash_ag_grid as dag
 
@@ -69,6 +69,45 @@ df = (
 )
 state_list = sorted(df['STATE'].unique().to_list())
 
+#----- MAP LEVEL-OF-DETAIL PYRAMID ---------------------------------------------
+# Below DETAIL_ZOOM the map shows dams aggregated onto a lat/long grid, one
+# pyramid level per integer zoom. Cell size halves with each zoom step, giving
+# about 8 cells across a map tile. States with no more than DETAIL_MAX_DAMS
+# dams always show individual dams.
+DETAIL_ZOOM = 9
+DETAIL_MAX_DAMS = 2000
+
+def get_cell_deg(zoom):
+    return 360 / 2**(zoom + 3)
+
+df_map = (
+    df
+    .select('STATE', 'LONG', 'LAT', 'DECADE_COMP','MAX_STG_ACR_FT')
+    .filter(pl.col('LAT').is_not_null(), pl.col('LONG').is_not_null())
+    .sort(['DECADE_COMP', 'MAX_STG_ACR_FT'])
+)
+state_dams = df_map.partition_by('STATE', as_dict=True)
+
+df_pyramid = pl.concat(
+    [
+        df_map
+        .with_columns(
+            CELL_LAT = (pl.col('LAT')/get_cell_deg(zoom)).floor(),
+            CELL_LONG = (pl.col('LONG')/get_cell_deg(zoom)).floor(),
+        )
+        .group_by('STATE', 'CELL_LAT', 'CELL_LONG')
+        .agg(
+            LAT = pl.col('LAT').mean(),
+            LONG = pl.col('LONG').mean(),
+            DAM_COUNT = pl.len(),
+            MAX_STG_ACR_FT = pl.col('MAX_STG_ACR_FT').sum(),
+        )
+        .with_columns(ZOOM = pl.lit(zoom, dtype=pl.Int8))
+        for zoom in range(DETAIL_ZOOM)
+    ]
+)
+state_clusters = df_pyramid.partition_by(['STATE', 'ZOOM'], as_dict=True)
+
 #----- CALLBACK FUNCTIONS ------------------------------------------------------
 def get_state_stat(df, param, col):
     return(
@@ -78,13 +117,7 @@ def get_state_stat(df, param, col):
         [0]
     )
 
-def get_scatter_map(state):
-    df_state = (
-        df
-        .filter(pl.col('STATE') == state)
-        .select('STATE', 'LONG', 'LAT', 'DECADE_COMP','MAX_STG_ACR_FT')
-        .sort(['DECADE_COMP', 'MAX_STG_ACR_FT'])
-    )
+def get_state_zoom(state):
     state_zoom = 4  # default. following code changes zoom for listed states
     if state in ['Alaska']:
         state_zoom = 2
@@ -96,14 +129,63 @@ def get_scatter_map(state):
         state_zoom = 7
     elif state in ['Guam']:
         state_zoom = 8
-    scatter_map = px.scatter_map(  # map libre
-        df_state,
-        lat='LAT',
-        lon='LONG',
-        zoom=state_zoom,
-        color='DECADE_COMP',
+    return state_zoom
+
+def get_map_bounds(relayout_data):
+    # map._derived holds the 4 corners of the visible map as [lon, lat] pairs
+    corners = relayout_data.get('map._derived', {}).get('coordinates')
+    if not corners:
+        return None
+    lons = [c[0] for c in corners]
+    lats = [c[1] for c in corners]
+    return (min(lons), max(lons), min(lats), max(lats))
+
+def filter_bounds(df_points, bounds):
+    if bounds is None:
+        return df_points
+    lon_min, lon_max, lat_min, lat_max = bounds
+    return df_points.filter(
+        pl.col('LONG').is_between(lon_min, lon_max),
+        pl.col('LAT').is_between(lat_min, lat_max),
     )
-    scatter_map.update_layout(legend_title = '<b>Completed</b>')
+
+def get_scatter_map(state, zoom=None, center=None, bounds=None):
+    if zoom is None:
+        zoom = get_state_zoom(state)
+    level = int(zoom)
+    df_state = state_dams.get((state,), df_map.clear())
+    if level >= DETAIL_ZOOM or df_state.height <= DETAIL_MAX_DAMS:
+        scatter_map = px.scatter_map(  # map libre
+            filter_bounds(df_state, bounds),
+            lat='LAT',
+            lon='LONG',
+            zoom=zoom,
+            center=center,
+            color='DECADE_COMP',
+        )
+        scatter_map.update_layout(legend_title = '<b>Completed</b>')
+    else:   # aggregated cluster markers, sized by dam count
+        scatter_map = px.scatter_map(
+            filter_bounds(
+                state_clusters.get((state, level), df_pyramid.clear()), bounds
+            ),
+            lat='LAT',
+            lon='LONG',
+            zoom=zoom,
+            center=center,
+            size='DAM_COUNT',
+            color='DAM_COUNT',
+            custom_data=['DAM_COUNT', 'MAX_STG_ACR_FT'],
+        )
+        scatter_map.update_traces(
+            hovertemplate =
+                'Dams: %{customdata[0]:,d}<br>' +
+                'Max Storage: %{customdata[1]:,.0f} acre-feet<br>' +
+                '<extra></extra>'
+        )
+        scatter_map.update_layout(coloraxis_colorbar_title = '<b>Dams</b>')
+    # keep the user's view when the level of detail changes
+    scatter_map.update_layout(uirevision=state)
     return(scatter_map)
 
 def get_top_10_bar(state):
@@ -259,6 +341,23 @@ app.layout =  dbc.Container(
 
 @app.callback(
     Output('scatter_map', 'figure'),
+    Input('state_select', 'value'),
+    Input('scatter_map', 'relayoutData'),
+)
+def update_scatter_map(selected_state, relayout_data):
+    if ctx.triggered_id == 'scatter_map':
+        # only pan and zoom events change the level of detail
+        if not relayout_data or 'map.zoom' not in relayout_data:
+            return no_update
+        return get_scatter_map(
+            selected_state,
+            zoom=relayout_data['map.zoom'],
+            center=relayout_data.get('map.center'),
+            bounds=get_map_bounds(relayout_data),
+        )
+    return get_scatter_map(selected_state)
+
+@app.callback(
     Output('top_10_bar', 'figure'),
     Output('id-state-desc-title','children'),
     Output('id-state-desc-text','children'),
@@ -267,7 +366,6 @@ app.layout =  dbc.Container(
 )
 def update_dashboard(selected_state):
     return (
-        get_scatter_map(selected_state),
         get_top_10_bar(selected_state),
         selected_state.upper(),
         get_state_card_text(selected_state),
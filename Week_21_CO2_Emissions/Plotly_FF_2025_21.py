@@ -32,24 +32,11 @@ style_h3 = {'text-align': 'center', 'font-size': '16px', 'fontFamily': 'Arial','
 
 #----- FUNCTIONS  --------------------------------------------------------------
 def get_corr_stat(stat, corr_x, corr_y, group_by):
-    df_plot = df_year.drop_nulls([corr_x, corr_y])
-    if group_by == 'DECADE':
-        df_plot = df_decade.drop_nulls([corr_x, corr_y])
-    res = stats.linregress(df_plot[corr_x], df_plot[corr_y])
-    if stat == 'SLOPE':
-        val = res.slope
-    elif stat == 'INTERCEPT':  
-        val = res.intercept
-    elif stat == 'CORR':  
-        val = res.rvalue**2
-    elif stat == 'STDERR':  
-        val = res.stderr
-    elif stat == 'I_STDERR': 
-        val = res.intercept_stderr
-    else:
+    # stat is one of SLOPE, INTERCEPT, CORR, STDERR or I_STDERR
+    if stat not in corr_stat_names:
         print('illegal value, unrecognized stat')
-        val = -999999
-    return val
+        return -999999
+    return corr_stats[(group_by, corr_x, corr_y)][stat]
 
 #----- DASHBOARD COMPONENTS ----------------------------------------------------
 grid = dag.AgGrid(
@@ -197,6 +184,34 @@ df_decade_diff = (
     .collect()   # dataframe
 )
 
+#----- REGRESSION LOOKUP TABLE -------------------------------------------------
+# linregress results for every (group_by, corr_x, corr_y) combination are
+# computed once here. Callbacks read from corr_stats, keyed by that tuple.
+corr_stat_names = ['SLOPE', 'INTERCEPT', 'CORR', 'STDERR', 'I_STDERR']
+corr_stat_rows = []
+for group_by, df_group in [('YEAR', df_year), ('DECADE', df_decade)]:
+    for corr_x in short_param_names:
+        for corr_y in short_param_names:
+            df_pair = df_group.drop_nulls([corr_x, corr_y])
+            res = stats.linregress(df_pair[corr_x], df_pair[corr_y])
+            corr_stat_rows.append({
+                'GROUP_BY': group_by,
+                'CORR_X': corr_x,
+                'CORR_Y': corr_y,
+                'SLOPE': res.slope,
+                'INTERCEPT': res.intercept,
+                'CORR': res.rvalue**2,
+                'STDERR': res.stderr,
+                'I_STDERR': res.intercept_stderr,
+                'X_MIN': df_pair[corr_x].min(),
+                'X_MAX': df_pair[corr_x].max(),
+            })
+df_corr_stats = pl.DataFrame(corr_stat_rows)
+corr_stats = {
+    (row['GROUP_BY'], row['CORR_X'], row['CORR_Y']): row
+    for row in df_corr_stats.iter_rows(named=True)
+}
+
 #----- CALLBACK FUNCTIONS ------------------------------------------------------
 def get_data_plot(data_type, group_by, graph_type):
     if (data_type, group_by) == ('DATA', 'YEAR'):
@@ -249,12 +264,12 @@ def get_corr_plot(corr_x, corr_y, group_by):
         df_plot = df_year.drop_nulls([corr_x, corr_y])
     if group_by == 'DECADE':
         df_plot = df_decade.drop_nulls([corr_x, corr_y])
-    regression_params = stats.linregress(df_plot[corr_x], df_plot[corr_y])
-    x_min = df_plot[corr_x].min()
-    x_max = df_plot[corr_x].max()
+    regression_params = corr_stats[(group_by, corr_x, corr_y)]
+    x_min = regression_params['X_MIN']
+    x_max = regression_params['X_MAX']
     # find values for y at x_min and x_max using y = mx + b
-    y_at_x_min = (regression_params.slope * x_min) + regression_params.intercept
-    y_at_x_max = (regression_params.slope * x_max) + regression_params.intercept
+    y_at_x_min = (regression_params['SLOPE'] * x_min) + regression_params['INTERCEPT']
+    y_at_x_max = (regression_params['SLOPE'] * x_max) + regression_params['INTERCEPT']
     fig=px.scatter(
         df_plot,
         x=corr_x,
@@ -1,3 +1,4 @@
+import numpy as np
 import polars as pl
 import polars.selectors as cs
 import plotly.express as px
@@ -50,6 +51,38 @@ film_list = sorted(df_global.unique('FILM')['FILM'].to_list())
 franchise_list = sorted(df_global.unique('FRANCHISE')['FRANCHISE'].to_list())
 plot_cols = sorted(df_global.select(cs.numeric().exclude('YEAR')).columns)
 
+#----- PRECOMPUTED CUBES AND INDEXES -------------------------------------------
+# parameter x franchise x series cube, raw and normalized to each franchise's
+# first film, so callbacks only slice. Missing films are NaN.
+series_list = [
+    str(i) for i in range(1, int(df_global['SERIES_NUM'].cast(pl.Int32).max()) + 1)
+]
+franchise_idx = np.array(
+    [franchise_list.index(f) for f in df_global['FRANCHISE']]
+)
+series_idx = df_global['SERIES_NUM'].cast(pl.Int32).to_numpy() - 1
+cube_data = np.full(
+    (len(plot_cols), len(franchise_list), len(series_list)), np.nan
+)
+cube_data[:, franchise_idx, series_idx] = (
+    df_global.select(plot_cols).cast(pl.Float64).to_numpy().T
+)
+cube_norm = (cube_data - cube_data[:, :, :1]) / cube_data[:, :, :1] * 100
+plot_cubes = {'DATA': cube_data, 'NORMALIZED': cube_norm}
+
+# film -> row of df_global, first row wins for any repeated film name
+film_rows = {}
+for row in df_global.iter_rows(named=True):
+    film_rows.setdefault(row['FILM'], row)
+
+# franchise -> franchise table rows, sorted by series number
+franchise_rows = {
+    franchise: df.sort('SERIES_NUM').to_dicts()
+    for (franchise,), df in df_franchise.partition_by(
+        'FRANCHISE', as_dict=True
+    ).items()
+}
+
 style_horiz_line = {'border': 'none', 'height': '4px', 
     'background': 'linear-gradient(to right, #007bff, #ff7b00)', 
     'margin': '10px,', 'fontsize': 32}
@@ -59,22 +92,10 @@ style_h2 = {'text-align': 'center', 'font-size': '32px',
 
 #----- GENERAL FUNCTIONS  ------------------------------------------------------
 def get_film_data(film, item):
-    result = (
-        df_global
-        .filter(pl.col('FILM') == film)
-        [item]
-        [0]
-    )
-    return result
+    return film_rows[film][item]
 
 def get_franchise(film):    
-    return(
-        df_global
-        .filter(pl.col('FILM') ==  film)
-        .head(1)
-        ['FRANCHISE']
-        [0]
-    )
+    return film_rows[film]['FRANCHISE']
 
 #----- DASHBOARD COMPONENTS ----------------------------------------------------
 grid = (
@@ -181,32 +202,18 @@ for card in card_names:
 
 #----- CALLBACK FUNCTIONS ------------------------------------------------------
 def get_plot(plot_parameter, mode):
-    if mode == 'DATA':
-        df_plot = (
-            df_global
-            .select('FILM', 'FRANCHISE', 'YEAR', 'SERIES_NUM', plot_parameter)
-            .pivot(
-                on='FRANCHISE',
-                values=plot_parameter,
-                index='SERIES_NUM'
-            )
-        )
-    elif mode == 'NORMALIZED':
-        df_plot = (
-            df_global
-            .select('FILM', 'FRANCHISE', 'YEAR', 'SERIES_NUM', plot_parameter)
-            .pivot(
-                on='FRANCHISE',
-                values=plot_parameter,
-                index='SERIES_NUM'
-            )
-            .with_columns(
-                ((pl.col(franchise_list) - pl.col(franchise_list).first()) /
-                pl.col(franchise_list).first()).mul(100)
-            )
-        )
-    else:
+    if mode not in plot_cubes:
         print(f'{mode = } is not supported !!!!')
+    # franchise x series slice of the precomputed cube, transposed to one
+    # column per franchise
+    df_plot = (
+        pl.DataFrame(
+            plot_cubes[mode][plot_cols.index(plot_parameter)].T,
+            schema=franchise_list,
+            orient='row'
+        )
+        .with_columns(SERIES_NUM = pl.Series(series_list))
+    )
     fig=px.line(
         df_plot,
         'SERIES_NUM',
@@ -355,12 +362,7 @@ def update_dashboard(parameter, film):
         f'{get_film_data(film, 'WEEK2_DROP_OFF'):.0%}',
         f'{get_film_data(film, 'WW_GROSS'):.0f} M$',
         f'Movie Cards for {film}',
-        (
-            df_franchise
-            .filter(pl.col('FRANCHISE') == franchise)
-            .sort('SERIES_NUM')
-            .to_dicts()
-        )
+        franchise_rows[franchise],
     )
 if __name__ == '__main__':
     app.run_server(debug=True)
\ No newline at end of file
@@ -1,38 +1,74 @@
 import polars as pl
 import plotly.express as px
+import os
 import dash
 from dash import Dash, dcc, html, Input, Output
 import dash_mantine_components as dmc
 from dash_ag_grid import AgGrid
+from violations_store import read_violations, get_data_mtime
 dash._dash_renderer._set_react_version('18.2.0')
 
 #----- DATA GATHER AND CLEAN ---------------------------------------------------
 # provided csv file (49M) was cleaned, saved as a parquet file (87K). 
-if False:
-    df = (
-        pl.read_csv(
-            'Open_Parking_and_Camera_Violations.csv',
-            try_parse_dates=True,
-            ignore_errors=True
+# Run `python violations_store.py` after downloading a newer csv to add its
+# new rows to the date-partitioned store.
+
+df = read_violations()
+
+#----- PRECOUNTED HISTOGRAM BINS -----------------------------------------------
+hist_cols = ['FINE_AMT', 'PAY_AMT', 'JUDGE_DAYS']
+hist_bin_count = 40   # equal width bins from min to max, per violation
+bins_file = 'Open_Parking_and_Camera_Violations_bins.parquet'
+
+def get_hist_bins(df):
+    ''' count of tickets in each bin of each hist_col, for each violation '''
+    return pl.concat([
+        df
+        .select('VIOLATION', VALUE = pl.col(data_col).cast(pl.Float64))
+        .drop_nulls()
+        .with_columns(
+            BIN_MIN = pl.col('VALUE').min().over('VIOLATION'),
+            BIN_WIDTH = (
+                (pl.col('VALUE').max() - pl.col('VALUE').min())
+                .over('VIOLATION') / hist_bin_count
+            ),
         )
-        .select( 
-            ISSUE_DATE = pl.col('Issue Date'),
-            VIOLATION=pl.col('Violation'),
-            JUDGE_DATE = pl.col('Judgment Entry Date'),
-            FINE_AMT = pl.col('Fine Amount'),
-            PAY_AMT = pl.col('Payment Amount'),
-            STATUS = pl.col('Violation Status'),
+        .with_columns(  # single valued data gets one bin of width 1
+            BIN_WIDTH = pl.when(pl.col('BIN_WIDTH') > 0)
+                .then(pl.col('BIN_WIDTH'))
+                .otherwise(pl.lit(1.0))
         )
         .with_columns(
-            JUDGE_DAYS = (
-                pl.col('JUDGE_DATE') - pl.col('ISSUE_DATE'))
-                .dt.total_days()
+            BIN = ((pl.col('VALUE') - pl.col('BIN_MIN')) / pl.col('BIN_WIDTH'))
+                .floor()
+                .clip(0, hist_bin_count - 1)
         )
-        .filter(pl.col('JUDGE_DAYS') > 0)  
-    )
-    df.write_parquet('Open_Parking_and_Camera_Violations.parquet')
+        .group_by('VIOLATION', 'BIN', 'BIN_MIN', 'BIN_WIDTH')
+        .agg(COUNT = pl.len().cast(pl.UInt32))
+        .select(
+            'VIOLATION',
+            DATA_COL = pl.lit(data_col),
+            BIN_START = pl.col('BIN_MIN') + pl.col('BIN') * pl.col('BIN_WIDTH'),
+            BIN_WIDTH = pl.col('BIN_WIDTH'),
+            COUNT = pl.col('COUNT'),
+        )
+        for data_col in hist_cols
+    ]).sort('VIOLATION', 'DATA_COL', 'BIN_START')
+
+if (
+    os.path.exists(bins_file) and 
+    os.path.getmtime(bins_file) >= get_data_mtime()
+):
+    df_hist_bins = pl.read_parquet(bins_file)
 else:
-    df = pl.read_parquet('Open_Parking_and_Camera_Violations.parquet')
+    print(f'writing {bins_file}')
+    df_hist_bins = get_hist_bins(df)
+    df_hist_bins.write_parquet(bins_file)
+
+# {(violation, data_col): bins}, callbacks send these counts, not raw tickets
+hist_bins = df_hist_bins.partition_by(
+    ['VIOLATION', 'DATA_COL'], as_dict=True, include_key=False
+)
 #----- GLOBALS -----------------------------------------------------------------
 style_horiz_line = {'border': 'none', 'height': '4px', 
     'background': 'linear-gradient(to right, #007bff, #ff7b00)', 
@@ -48,19 +84,28 @@ print(f'{len(violation_list) = }')
 print(f'{violation_list = }')
 
 #----- CALLBACK FUNCTIONS-------------------------------------------------------
-def get_px_hist(df, violation, data_col):
+def get_px_hist(violation, data_col):
     if data_col == 'FINE_AMT':
         graph_title = 'DISTRIBUTION OF FINES ASSESSED'
     if data_col == 'PAY_AMT':
         graph_title = 'DISTRIBUTION OF AMOUNTS PAID'
     if data_col == 'JUDGE_DAYS':
         graph_title = 'DAYS BETWEEN VIOLATION AND JUDGEMENT'
-    fig = px.histogram(
-        df.filter(pl.col('VIOLATION') == violation),
-        x=data_col,
+    df_empty = df_hist_bins.clear().drop('VIOLATION', 'DATA_COL')
+    df_bins = (
+        hist_bins
+        .get((violation, data_col), df_empty)   # empty when no data
+        .with_columns(BIN_CENTER = pl.col('BIN_START') + pl.col('BIN_WIDTH') / 2)
+    )
+    fig = px.bar(
+        df_bins,
+        x='BIN_CENTER',
+        y='COUNT',
         template='simple_white',
-        title=graph_title
+        title=graph_title,
+        labels={'BIN_CENTER': data_col, 'COUNT': 'count'},
     )
+    fig.update_traces(width=df_bins['BIN_WIDTH'].to_list()) # bars fill each bin
     return fig
  
 def make_violation_table():
@@ -124,9 +169,9 @@ def update_dashboard(violation):  # line_shape, scale, test, dag_test):
     else:
         violation_name = violation["value"]
     print(f'{violation_name = }')
-    px_hist_fine = get_px_hist(df, violation_name, 'FINE_AMT')
-    px_hist_paid = get_px_hist(df, violation_name, 'PAY_AMT')
-    px_hist_period = get_px_hist(df, violation_name, 'JUDGE_DAYS')
+    px_hist_fine = get_px_hist(violation_name, 'FINE_AMT')
+    px_hist_paid = get_px_hist(violation_name, 'PAY_AMT')
+    px_hist_period = get_px_hist(violation_name, 'JUDGE_DAYS')
     return px_hist_fine, px_hist_paid, px_hist_period, violation_name
 
 if __name__ == '__main__':
@@ -0,0 +1,61 @@
+from datetime import date, datetime
+import polars as pl
+import pytest
+import violations_store as vs
+
+csv_header = (
+    'Issue Date,Violation,Judgment Entry Date,Fine Amount,Payment Amount,'
+    'Violation Status\n'
+)
+
+def write_csv(rows):
+    with open(vs.csv_file, 'w') as f:
+        f.write(csv_header + ''.join(f'{row}\n' for row in rows))
+
+def write_legacy_parquet():
+    pl.DataFrame({   # original parquet file stores dates as datetimes
+        'ISSUE_DATE': [datetime(2023, 12, 30), datetime(2023, 12, 31)],
+        'VIOLATION': ['NO PARKING', 'BUS LANE'],
+        'JUDGE_DATE': [datetime(2024, 2, 1), datetime(2024, 2, 2)],
+        'FINE_AMT': [65, 50],
+        'PAY_AMT': [65.0, 0.0],
+        'STATUS': ['PAID', 'OPEN'],
+        'JUDGE_DAYS': [33, 33],
+    }).write_parquet(vs.parquet_file)
+
+def test_ingest_twice_then_read(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_legacy_parquet()
+    feed_rows = [
+        '12/30/2023 00:00:00,NO PARKING,02/01/2024 00:00:00,65.00,65.00,PAID',
+        '12/31/2023 00:00:00,BUS LANE,02/02/2024 00:00:00,50.00,0.00,OPEN',
+        '01/05/2024 00:00:00,NO PARKING,02/20/2024 00:00:00,65.00,65.00,PAID',
+    ]
+    write_csv(feed_rows)
+    vs.ingest_csv()
+    assert vs.read_violations().height == 3
+
+    write_csv(feed_rows + [  # a late ticket for a day already ingested
+        '01/05/2024 00:00:00,BUS LANE,03/01/2024 00:00:00,50.00,,OPEN',
+        '01/09/2024 00:00:00,BUS LANE,03/01/2024 00:00:00,50.00,,OPEN',
+    ])
+    vs.ingest_csv()
+
+    df = vs.read_violations()
+    assert df.columns == vs.column_list
+    assert dict(df.schema) == vs.store_schema
+    assert df.height == 5
+    assert df.filter(pl.col('ISSUE_DATE') == date(2024, 1, 5)).height == 2
+    assert sorted(tmp_path.joinpath(vs.parquet_store).iterdir()) == [
+        tmp_path / vs.parquet_store / f'ISSUE_DATE={issue_date}'
+        for issue_date in [
+            '2023-12-30', '2023-12-31', '2024-01-05', '2024-01-09'
+        ]
+    ]
+
+def test_unknown_date_format_raises(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_csv(['2024.01.05,NO PARKING,2024.02.20,65.00,65.00,PAID'])
+    with pytest.raises(ValueError, match='unknown date format'):
+        vs.ingest_csv()
+    assert not tmp_path.joinpath(vs.parquet_store).exists()
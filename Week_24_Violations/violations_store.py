@@ -0,0 +1,146 @@
+'''
+Date-partitioned parquet store for the violations data. Run
+`python violations_store.py` after downloading a newer csv of the full feed.
+Tickets reach the feed some days after they are issued, so every ingest
+re-reads the last refresh_days of issue dates from the csv and replaces those
+folders, then adds the newer ones. The original parquet file seeds the first
+ingest, its datetime columns are stored as dates like new rows.
+'''
+import polars as pl
+from datetime import date, timedelta
+import os
+import shutil
+
+#----- GLOBALS -----------------------------------------------------------------
+csv_file = 'Open_Parking_and_Camera_Violations.csv'
+parquet_file = 'Open_Parking_and_Camera_Violations.parquet'
+parquet_store = 'violations_by_date'  # ISSUE_DATE=YYYY-MM-DD/part-0.parquet
+refresh_days = 30   # issue dates before the last one that are read again
+date_formats = [    # csv dates, with or without a time part
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %I:%M:%S %p',
+    '%m/%d/%Y',
+    '%Y-%m-%dT%H:%M:%S%.f',
+]
+store_schema = {   # every partition and every read uses these types
+    'ISSUE_DATE': pl.Date,
+    'VIOLATION': pl.String,
+    'JUDGE_DATE': pl.Date,
+    'FINE_AMT': pl.Int64,
+    'PAY_AMT': pl.Float64,
+    'STATUS': pl.String,
+    'JUDGE_DAYS': pl.Int64,
+}
+column_list = list(store_schema)
+
+#----- FUNCTIONS ---------------------------------------------------------------
+def get_data_mtime():
+    ''' modification time of the newest data file '''
+    if not os.path.exists(parquet_store):
+        return os.path.getmtime(parquet_file)
+    return max(
+        os.path.getmtime(os.path.join(root, file_name))
+        for root, _, file_names in os.walk(parquet_store)
+        for file_name in file_names
+    )
+
+def read_violations():
+    if os.path.exists(parquet_store):
+        df = pl.read_parquet(
+            os.path.join(parquet_store, '**', '*.parquet'),
+            hive_partitioning=True,
+            hive_schema={'ISSUE_DATE': pl.Date},
+        )
+    else:
+        df = pl.read_parquet(parquet_file)
+    return df.select(column_list).cast(store_schema)
+
+def get_last_date():
+    ''' newest ISSUE_DATE in the store, from the folder names '''
+    return max(
+        date.fromisoformat(folder.split('=')[1])
+        for folder in os.listdir(parquet_store)
+    )
+
+def write_partitions(df_rows):
+    ''' one file per ISSUE_DATE folder, replacing what the folder held '''
+    for (issue_date,), df_day in (
+        df_rows
+        .select(column_list)
+        .cast(store_schema)
+        .partition_by('ISSUE_DATE', as_dict=True, include_key=False)
+        .items()
+    ):
+        day_dir = os.path.join(parquet_store, f'ISSUE_DATE={issue_date}')
+        if os.path.exists(day_dir):
+            shutil.rmtree(day_dir)
+        os.makedirs(day_dir)
+        df_day.write_parquet(os.path.join(day_dir, 'part-0.parquet'))
+
+def parse_date(col_name):
+    ''' date of a csv date or datetime string, null if no format fits '''
+    return (
+        pl.coalesce(
+            pl.col(col_name).str.to_datetime(date_format, strict=False)
+            for date_format in date_formats
+        )
+        .dt.date()
+    )
+
+def ingest_csv():
+    ''' replace the last refresh_days of issue dates and add newer ones '''
+    start_date = None
+    if not os.path.exists(parquet_store) and os.path.exists(parquet_file):
+        print(f'moving {parquet_file} to {parquet_store}')
+        write_partitions(read_violations())
+    if os.path.exists(parquet_store):
+        start_date = get_last_date() - timedelta(days=refresh_days)
+    print(f'reading rows issued from {start_date} on from {csv_file}')
+    lf = (
+        pl.scan_csv(csv_file, infer_schema=False)
+        .select(
+            ISSUE_TEXT = pl.col('Issue Date'),
+            JUDGE_TEXT = pl.col('Judgment Entry Date'),
+            ISSUE_DATE = parse_date('Issue Date'),
+            VIOLATION=pl.col('Violation'),
+            JUDGE_DATE = parse_date('Judgment Entry Date'),
+            FINE_AMT = pl.col('Fine Amount')
+                .cast(pl.Float64, strict=False).cast(pl.Int64),
+            PAY_AMT = pl.col('Payment Amount').cast(pl.Float64, strict=False),
+            STATUS = pl.col('Violation Status'),
+        )
+    )
+    df_unparsed = (   # dates in a format not in date_formats
+        lf
+        .filter(
+            (pl.col('ISSUE_TEXT').is_not_null() & pl.col('ISSUE_DATE').is_null())
+            | (pl.col('JUDGE_TEXT').is_not_null() & pl.col('JUDGE_DATE').is_null())
+        )
+        .select('ISSUE_TEXT', 'JUDGE_TEXT')
+        .head(5)
+        .collect()
+    )
+    if df_unparsed.height:
+        raise ValueError(
+            f'unknown date format in {csv_file}, add it to date_formats:\n'
+            f'{df_unparsed}'
+        )
+    lf = lf.filter(pl.col('ISSUE_DATE').is_not_null())
+    if start_date is not None:
+        lf = lf.filter(pl.col('ISSUE_DATE') >= start_date)
+    df_new = (
+        lf
+        .with_columns(
+            JUDGE_DAYS = (
+                pl.col('JUDGE_DATE') - pl.col('ISSUE_DATE'))
+                .dt.total_days()
+        )
+        .filter(pl.col('JUDGE_DAYS') > 0)
+        .select(column_list)
+        .collect()
+    )
+    write_partitions(df_new)
+    print(f'wrote {df_new.height} rows to {parquet_store}')
+
+if __name__ == '__main__':
+    ingest_csv()
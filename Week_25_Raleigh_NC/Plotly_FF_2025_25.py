@@ -1,9 +1,10 @@
 import polars as pl
 import plotly.express as px
 import dash
-from dash import Dash, dcc, html, Input, Output
+from dash import Dash, dcc, html, Input, Output, ctx
 import dash_mantine_components as dmc
 from dash_ag_grid import AgGrid
+from ff_components import get_map_figure, get_map_style_patch
 dash._dash_renderer._set_react_version('18.2.0')
 
 #----- GATHER AND CLEAN DATA ---------------------------------------------------
@@ -140,8 +141,8 @@ def get_info_table(id=271601):
         )
     )
 
-def get_px_scatter_map(zip_code, this_map_style):
-    ''' returns plotly map_libre, type streets, magenta_r sequential  '''
+def get_px_scatter_map(zip_code):
+    ''' returns plotly map_libre, magenta_r sequential, style set by caller '''
     color_dict = {
             'Non-Residential'    : 'green',
             'Residential'       : 'blue'
@@ -160,7 +161,6 @@ def get_px_scatter_map(zip_code, this_map_style):
         color_discrete_map= color_dict,
         color_continuous_scale='Magenta_r',
         zoom=10,
-        map_style=this_map_style,       
         custom_data=[
             'PROJECT_ID',                 #  customdata[0]
             'ZIP',                #  customdata[1]
@@ -249,10 +249,14 @@ app.layout =  dmc.MantineProvider([
     Input('id_map_style', 'value'),
 )
 def update_map(zip_code, map_style):
+    if ctx.triggered_id == 'id_map_style':  # traces stay, only style changes
+        return get_map_style_patch(map_style), dash.no_update
     zip = zip_code_list[0]  # default
     if zip_code is not None: # replace default if zip_code has data
         zip = zip_code['value']
-    px_scatter_map = get_px_scatter_map(zip, map_style)
+    px_scatter_map = get_map_figure(
+        zip, lambda: get_px_scatter_map(zip), map_style
+    )
     return px_scatter_map, f'Zip Code {zip}: {get_zip_info(zip)}'
 
 # callback #2 update info table using hover data
@@ -1,6 +1,6 @@
 import plotly.express as px
+import numpy as np
 import polars as pl
-import polars.selectors as cs
 import dash
 import dash_ag_grid as dag
 from dash import Dash, dcc, html, Input, Output
@@ -96,6 +96,33 @@ dataset_names = [
     'Unemployment'
 ]
 
+#----- YEAR-ALIGNED DATA STORE -------------------------------------------------
+# All 4 datasets in one wide Float32 array, one row per year from min_year to
+# max_year, NaN where a dataset has no data. Callbacks slice rows by year and
+# columns by dataset.
+dataset_frames = dict(zip(dataset_names, [
+    df_gender_parity_mgmt,
+    df_gender_pay_gap,
+    df_labor_productivity,
+    df_unemployment,
+]))
+year_axis = np.arange(min_year, max_year + 1, dtype=np.uint16)
+dataset_cols = {}    # data column names of each dataset, YEAR excluded
+dataset_slices = {}  # store columns of each dataset
+dataset_years = {}   # store rows of the years each dataset covers
+col_start = 0
+for name, df in dataset_frames.items():
+    dataset_cols[name] = [c for c in df.columns if c != 'YEAR']
+    dataset_slices[name] = slice(col_start, col_start + len(dataset_cols[name]))
+    col_start += len(dataset_cols[name])
+
+store = np.full((len(year_axis), col_start), np.nan, dtype=np.float32)
+for name, df in dataset_frames.items():
+    rows = df['YEAR'].to_numpy().astype(np.int32) - min_year
+    store[rows, dataset_slices[name]] = df.select(dataset_cols[name]).to_numpy()
+    dataset_years[name] = np.zeros(len(year_axis), dtype=bool)
+    dataset_years[name][rows] = True
+
 #----- FUNCTIONS----------------------------------------------------------------
 def get_px_line(df, title):
     df_cols = df.columns
@@ -138,34 +165,27 @@ def get_px_line(df, title):
     return fig
 
 def get_df_raw(dataset_name, x_year_range):
-    '''returns requested data set, with years filtered by range slider'''
-    if dataset_name == 'Management Gender Parity':
-        df = df_gender_parity_mgmt
-    elif dataset_name == 'Gender Pay Gap':
-        df = df_gender_pay_gap
-    elif dataset_name == 'Labor Productivity':
-        df = df_labor_productivity
-    elif dataset_name == 'Unemployment':
-        df =df_unemployment
-    else:
+    '''returns years and values of requested data set, sliced by range slider'''
+    if dataset_name not in dataset_slices:
         print(f'NO VALID SELECION FOR {dataset_name}')
+    rows = slice(x_year_range[0] - min_year, x_year_range[1] - min_year + 1)
+    has_year = dataset_years[dataset_name][rows]
     return (
-        df
-        .select(first:=cs.by_name('YEAR'), ~first)
-        .filter(pl.col('YEAR') >= x_year_range[0])
-        .filter(pl.col('YEAR') <= x_year_range[1])
-        )
+        year_axis[rows][has_year],
+        store[rows, dataset_slices[dataset_name]][has_year]
+    )
 
-def get_df_norm(df_to_norm):
-    ''' returns dataframe with values normalized'''
-    for col in df_to_norm.columns[1:]:  # skips first column, which is the year
-        df_to_norm = (
-            df_to_norm
-            .with_columns(
-                ((100*pl.col(col)/pl.col(col).first()-100)).alias(col)
-            )
-        )
-    return df_to_norm
+def get_df_norm(raw_values):
+    ''' returns values normalized to the first year, all columns at once'''
+    return 100*raw_values/raw_values[:1] - 100
+
+def get_df(years, values, columns):
+    ''' returns dataframe with YEAR column first, NaN as null'''
+    return (
+        pl.DataFrame(values, schema=columns, orient='row')
+        .fill_nan(None)
+        .insert_column(0, pl.Series('YEAR', years))
+    )
     
 def get_dataset_radio_picker():
     ''' radio picker selects desired dataset'''
@@ -200,15 +220,13 @@ def get_range_slider():
         dmc.Text(id='range-slider-output'),
     )
 
-def join_by_year(df1, df2):
+def join_by_year(years, raw_values, norm_values, columns):
     ''' merges raw and normalized datasets for display in dash ag table'''
-    df_all = (
-        df1.join(
-        df2,
-        on='YEAR',
-        how='left',
-        suffix='_NORM'
-        )
+    # rows are already aligned by year, so this is a side by side stack
+    df_all = get_df(
+        years,
+        np.hstack([raw_values, norm_values]),
+        columns + [f'{c}_NORM' for c in columns]
     )
     float_cols = [c for c in sorted(df_all.columns[1:])]
     df_all_sorted_cols = (['YEAR'] + float_cols)
@@ -293,15 +311,18 @@ def update(from_radio, x_year_range):
     dataset_name = from_radio
     slider_label = f'{x_year_range[0]} to {x_year_range[1]} inclusive'
 
-    df_raw = get_df_raw(dataset_name, x_year_range)
+    columns = dataset_cols[dataset_name]
+    years, raw_values = get_df_raw(dataset_name, x_year_range)
     px_line_data = get_px_line(
-        df_raw, title=dataset_name.upper() + ' -- RAW DATA')
+        get_df(years, raw_values, columns),
+        title=dataset_name.upper() + ' -- RAW DATA')
     
-    df_norm = get_df_norm(df_raw)
+    norm_values = get_df_norm(raw_values)
     px_line_norm = get_px_line(
-        df_norm, title=dataset_name.upper() + ' -- NORMALIZED')
+        get_df(years, norm_values, columns),
+        title=dataset_name.upper() + ' -- NORMALIZED')
     
-    df_all = join_by_year(df_raw, df_norm)
+    df_all = join_by_year(years, raw_values, norm_values, columns)
     ag_col_defs = get_ag_col_defs(df_all.columns)    
     ag_row_data = df_all.to_dicts()
 
@@ -1,45 +1,28 @@
-import polars as pl
 import numpy as np
-from scipy.interpolate import griddata
 import plotly.graph_objects as go
 import dash
-from dash import Dash, dcc, html
+from dash import Dash, dcc, html, Input, Output, Patch, ctx
 import dash_mantine_components as dmc
+from grid_cache import (
+    dem_resolutions, load_dem, load_lod, load_tds_volume, lod_max_depth
+)
 dash._dash_renderer._set_react_version('18.2.0')
 
-# Groundwater salinity data from recent work.
-df = (
-    pl.read_csv("model-grid-subsample.csv")
-    .filter(pl.col('dem_m') > (pl.col('zkm')* 1e3))
-)
+# Groundwater salinity data and the interpolated land surface (DEM) are
+# memory-mapped from the grid_cache build step, see grid_cache.py. Salinity
+# points are ordered coarse to fine by octree level.
+points_lod = load_lod()
+lod_level = points_lod[:, 6].astype(np.int8)
+log_u = points_lod[:, 5]
 
-grid = df[['xkm', 'ykm', 'zkm', 'mean_tds']].to_numpy()
-x = grid[:, 0] * 1e3 # Kilometers to meters.
-y = grid[:, 1] * 1e3
-z = grid[:, 2] * 1e3
-u = grid[:, 3]
-
-# Digital Elevation Model (DEM) - the land surface in the study area.
-dem_grid = df[['xkm', 'ykm', 'dem_m']].to_numpy()
-
-x_dem = dem_grid[:, 0] * 1e3
-y_dem = dem_grid[:, 1] * 1e3
-z_dem = dem_grid[:, 2]
-
-# Interpolate the land surface point data.
-xi_dem = np.linspace(min(x_dem), max(x_dem), 200)
-yi_dem = np.linspace(min(y_dem), max(y_dem), 200)
-zi_dem = griddata(
-    (
-        x_dem, 
-        y_dem
-    ), 
-    z_dem, 
-    (
-        xi_dem.reshape(1, -1), 
-        yi_dem.reshape(-1, 1)
-    )
-)
+# approximate scene coordinates of each point, the data box maps to +/- 0.5
+lod_xyz = points_lod[:, :3]
+lod_span = np.ptp(lod_xyz, axis=0)
+lod_span[lod_span == 0] = 1
+lod_scene = (lod_xyz - lod_xyz.min(axis=0)) / lod_span - 0.5
+
+# log10(mean_tds) resampled onto a regular grid, for isosurface/volume plots
+tds_volume = load_tds_volume()
 
 
 #----- GLOBALS -----------------------------------------------------------------
@@ -50,6 +33,7 @@ style_horiz_line = {'border': 'none', 'height': '4px',
 style_h2 = {'text-align': 'center', 'font-size': '32px', 
             'fontFamily': 'Arial','font-weight': 'bold'}
 bg_color = 'lightgray'
+point_budget = 2000  # most salinity markers sent to the browser per render
 
 #----- FUNCTIONS ---------------------------------------------------------------
 
@@ -87,35 +71,102 @@ def update_3d_layout(fig, fig_title):
                         ),
         )
     return fig
-# Make the 3-d graph.
-trace_dem = go.Figure(go.Surface(
-    x=xi_dem, y=yi_dem, z=zi_dem,
-    colorscale='Earth',
-    name='Land surface',
-    showscale=False,
-    showlegend=False,
-))
-trace_dem = update_3d_layout(trace_dem, 'trace_dem Surface')
-trace_dem.update_traces(contours_z=dict(
-    show=True, usecolormap=True,
-    highlightcolor="limegreen",
-    project_z=True))
+
+def get_trace_dem(level):
+    # level is a key of dem_resolutions: LOW, MEDIUM or HIGH
+    xi_dem, yi_dem, zi_dem = load_dem(level)
+    trace_dem = go.Figure(go.Surface(
+        x=xi_dem, y=yi_dem, z=zi_dem,
+        colorscale='Earth',
+        name='Land surface',
+        showscale=False,
+        showlegend=False,
+    ))
+    trace_dem = update_3d_layout(trace_dem, 'trace_dem Surface')
+    trace_dem.update_traces(contours_z=dict(
+        show=True, usecolormap=True,
+        highlightcolor="limegreen",
+        project_z=True))
+    trace_dem.update_layout(uirevision='dem')  # keep camera on resolution swap
+    return trace_dem
+
+# Make the 3-d graph. Coarse surface first, the refine callback swaps in the
+# higher resolutions.
+dem_levels = list(dem_resolutions)
+trace_dem = get_trace_dem(dem_levels[0])
 
 scatter_ticks = (  # replaced hardcoded values with list compreshensions
     [t for t in range(400, 1000, 100)] +     # 200 to 800, step 100
     [t for t in range(1000, 11000, 1000)]    # 1K to 10K, step 1K
 )
 
-trace_groundwater = go.Figure(go.Scatter3d(
-    x=x, y=y, z=z, 
-    mode='markers',
-    name='Groundwater salinity',
-    showlegend=True,
-    marker=dict(
-        size=3, 
-        symbol='square', 
-        colorscale='RdYlBu_r', 
-        color=np.log10(u), # Log the colorscale.
+def get_lod_points(camera=None):
+    # Decimate the salinity points to fit point_budget. With a camera, only
+    # points inside a box around the camera center are kept, sized by the
+    # eye distance, so zooming in gets denser points.
+    visible = np.ones(len(points_lod), dtype=bool)
+    if camera:
+        eye = camera.get('eye', {})
+        center = camera.get('center', {})
+        eye = np.array([eye.get(k, 0) for k in 'xyz'])
+        center = np.array([center.get(k, 0) for k in 'xyz'])
+        half_width = 0.5 * np.linalg.norm(eye - center)
+        visible = np.all(np.abs(lod_scene - center) <= half_width, axis=1)
+    level_counts = np.cumsum(
+        np.bincount(lod_level[visible], minlength=lod_max_depth + 1)
+    )
+    # deepest octree level that fits in the budget, at least the coarsest
+    depth = max(np.searchsorted(level_counts, point_budget, side='right') - 1, 0)
+    return points_lod[visible & (lod_level <= depth)]
+
+def get_trace_groundwater(camera=None):
+    lod_points = get_lod_points(camera)
+    trace_groundwater = go.Figure(go.Scatter3d(
+        x=lod_points[:, 0], y=lod_points[:, 1], z=lod_points[:, 2], 
+        mode='markers',
+        name='Groundwater salinity',
+        showlegend=True,
+        marker=dict(
+            size=3, 
+            symbol='square', 
+            colorscale='RdYlBu_r', 
+            color=lod_points[:, 5], # Log the colorscale.
+            cmin=log_u.min(),  # fixed color range for every subset
+            cmax=log_u.max(),
+            colorbar=dict(
+                title=dict(
+                    text='Salinity (mg/L)', side='right'
+                ),
+                x=0.94,  # Move cbar over.
+                len=0.5,  # Shrink cbar.
+                ticks='outside',
+                tickvals=np.log10(scatter_ticks),
+                ticktext=scatter_ticks,                                                       ))
+    ))
+    trace_groundwater = update_3d_layout(trace_groundwater, 'trace_groundwater Scatter3D')
+    trace_groundwater.update_layout(uirevision='groundwater')  # keep camera
+    return trace_groundwater
+
+trace_groundwater = get_trace_groundwater()
+
+def get_trace_salinity(render_type, tds_range):
+    # render_type is ISOSURFACE or VOLUME, tds_range is [min, max] in log10 mg/L
+    if render_type == 'VOLUME':
+        trace_type = go.Volume
+        trace_style = dict(opacity=0.1, surface_count=15)
+    else:
+        trace_type = go.Isosurface
+        trace_style = dict(surface_count=4)
+    trace_salinity = go.Figure(trace_type(
+        x=tds_volume[:, 0], y=tds_volume[:, 1], z=tds_volume[:, 2],
+        value=tds_volume[:, 3],
+        isomin=tds_range[0],
+        isomax=tds_range[1],
+        name='Groundwater salinity',
+        colorscale='RdYlBu_r',
+        cmin=log_u.min(),
+        cmax=log_u.max(),
+        caps=dict(x_show=False, y_show=False, z_show=False),
         colorbar=dict(
             title=dict(
                 text='Salinity (mg/L)', side='right'
@@ -124,9 +175,36 @@ trace_groundwater = go.Figure(go.Scatter3d(
             len=0.5,  # Shrink cbar.
             ticks='outside',
             tickvals=np.log10(scatter_ticks),
-            ticktext=scatter_ticks,                                                       ))
-))
-trace_groundwater = update_3d_layout(trace_groundwater, 'trace_groundwater Scatter3D')
+            ticktext=scatter_ticks,
+        ),
+        **trace_style,
+    ))
+    trace_salinity = update_3d_layout(
+        trace_salinity, f'trace_salinity {trace_type.__name__}'
+    )
+    trace_salinity.update_layout(uirevision='salinity')  # keep camera
+    return trace_salinity
+
+salinity_marks = [1000, 2000, 5000, 10000]
+radio_render_type = dmc.RadioGroup(
+    children=dmc.Group(
+        [dmc.Radio(i, value=i) for i in ['ISOSURFACE', 'VOLUME']], my=10
+    ),
+    value='ISOSURFACE',
+    label='Render Type',
+    size='md',
+    id='salinity-render-type'
+)
+slider_tds_range = dmc.RangeSlider(
+    min=round(float(log_u.min()), 2),
+    max=round(float(log_u.max()), 2),
+    step=0.01,
+    value=[float(np.log10(2000)), float(np.log10(5000))],
+    marks=[
+        {'value': float(np.log10(t)), 'label': f'{t:,}'} for t in salinity_marks
+    ],
+    id='salinity-range'
+)
 
 #----- DASH APPLICATION STRUCTURE-----------------------------------------------
 app = Dash()
@@ -139,10 +217,65 @@ app.layout =  dmc.MantineProvider([
     dmc.Space(h=100),
     dmc.Grid(
         children = [ 
-            dmc.GridCol(dcc.Graph(figure=trace_dem),span=5, offset=1),
-            dmc.GridCol(dcc.Graph(figure=trace_groundwater),span=5, offset=1),
+            dmc.GridCol(dcc.Graph(figure=trace_dem, id='graph-dem'),span=5, offset=1),
+            dmc.GridCol(dcc.Graph(figure=trace_groundwater, id='graph-groundwater'),span=5, offset=1),
+        ]
+    ),
+    dmc.Space(h=30),
+    html.Hr(style=style_horiz_line),
+    dmc.Grid(
+        children = [ 
+            dmc.GridCol(radio_render_type, span=3, offset=1),
+            dmc.GridCol(
+                [dmc.Text('Salinity Range (mg/L)'), slider_tds_range],
+                span=5, offset=1
+            ),
+        ]
+    ),
+    dmc.Space(h=30),
+    dmc.Grid(
+        children = [ 
+            dmc.GridCol(dcc.Graph(id='graph-salinity'),span=5, offset=1),
         ]
     ),
+    dcc.Interval(
+        id='dem-refine', interval=1000, max_intervals=len(dem_levels) - 1
+    ),
 ])
+
+@app.callback(
+    Output('graph-dem', 'figure'),
+    Input('dem-refine', 'n_intervals'),
+    prevent_initial_call=True,
+)
+def refine_dem(n_intervals):
+    # step up one resolution per interval: LOW -> MEDIUM -> HIGH
+    return get_trace_dem(dem_levels[min(n_intervals, len(dem_levels) - 1)])
+
+@app.callback(
+    Output('graph-groundwater', 'figure'),
+    Input('graph-groundwater', 'relayoutData'),
+    prevent_initial_call=True,
+)
+def refine_groundwater(relayout_data):
+    # camera moves re-pick the decimated points for the new view
+    if not relayout_data or 'scene.camera' not in relayout_data:
+        return dash.no_update
+    return get_trace_groundwater(relayout_data['scene.camera'])
+
+@app.callback(
+    Output('graph-salinity', 'figure'),
+    Input('salinity-render-type', 'value'),
+    Input('salinity-range', 'value'),
+)
+def update_salinity(render_type, tds_range):
+    if ctx.triggered_id == 'salinity-range':
+        # threshold changes only restyle the grid already in the browser
+        patched_fig = Patch()
+        patched_fig['data'][0]['isomin'] = tds_range[0]
+        patched_fig['data'][0]['isomax'] = tds_range[1]
+        return patched_fig
+    return get_trace_salinity(render_type, tds_range)
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import numpy as np
+import polars as pl
+from scipy.interpolate import griddata
+# Build step for the Week 27 3D figures. The octree-ordered salinity points,
+# the resampled salinity volume and the interpolated land surface are saved as
+# .npy files in grid_cache/, keyed by a hash of the input csv and the build
+# parameters, and memory-mapped by the app. Run `python grid_cache.py` to
+# build the cache ahead of time. Otherwise the app builds missing files on its
+# first start.
+
+#----- GLOBALS -----------------------------------------------------------------
+data_file = 'model-grid-subsample.csv'
+cache_dir = 'grid_cache'
+dem_resolutions = {'LOW': 50, 'MEDIUM': 100, 'HIGH': 200}  # grid points per axis
+lod_max_depth = 6  # octree depth for point decimation, up to 64 voxels per axis
+tds_volume_resolution = 30  # grid points per axis of the resampled salinity
+cache_version = 2  # bump when the contents of the cached arrays change
+
+#----- FUNCTIONS ---------------------------------------------------------------
+def get_input_hash():
+    ''' hash of the input csv, the build parameters and cache_version '''
+    digest = hashlib.sha1()
+    with open(data_file, 'rb') as f:
+        digest.update(f.read())
+    build_params = (
+        cache_version, dem_resolutions, lod_max_depth, tds_volume_resolution
+    )
+    digest.update(repr(build_params).encode())
+    return digest.hexdigest()[:12]
+
+def get_cache_path(name):
+    return os.path.join(cache_dir, f'{name}_{input_hash}.npy')
+
+def read_points():
+    # Groundwater salinity data from recent work.
+    df = (
+        pl.read_csv(data_file)
+        .filter(pl.col('dem_m') > (pl.col('zkm')* 1e3))
+    )
+    # columns: x, y, z (m), mean_tds, land surface elevation dem_m
+    return np.column_stack([
+        df['xkm'].to_numpy() * 1e3, # Kilometers to meters.
+        df['ykm'].to_numpy() * 1e3,
+        df['zkm'].to_numpy() * 1e3,
+        df['mean_tds'].to_numpy(),
+        df['dem_m'].to_numpy(),
+    ])
+
+def build_dem(points, resolution):
+    # Digital Elevation Model (DEM) - interpolate the land surface point data.
+    x_dem = points[:, 0]
+    y_dem = points[:, 1]
+    z_dem = points[:, 4]
+    xi_dem = np.linspace(min(x_dem), max(x_dem), resolution)
+    yi_dem = np.linspace(min(y_dem), max(y_dem), resolution)
+    zi_dem = griddata(
+        (
+            x_dem,
+            y_dem
+        ),
+        z_dem,
+        (
+            xi_dem.reshape(1, -1),
+            yi_dem.reshape(-1, 1)
+        )
+    )
+    return np.vstack([xi_dem, yi_dem]), zi_dem
+
+def build_lod(points):
+    # Order the salinity points coarse to fine for progressive rendering. A
+    # point's level is the shallowest octree depth at which it is the first
+    # point in its voxel, so the points with level <= d hold exactly one point
+    # per occupied voxel at depth d.
+    xyz = points[:, :3]
+    span = np.ptp(xyz, axis=0)
+    span[span == 0] = 1
+    unit = (xyz - xyz.min(axis=0)) / span
+    level = np.full(len(points), lod_max_depth, dtype=np.int8)
+    for depth in range(lod_max_depth):
+        n_cells = 2**depth
+        cells = np.minimum((unit * n_cells).astype(np.int64), n_cells - 1)
+        cell_ids = (cells[:, 0] * n_cells + cells[:, 1]) * n_cells + cells[:, 2]
+        _, first = np.unique(cell_ids, return_index=True)
+        level[first] = np.minimum(level[first], depth)
+    order = np.argsort(level, kind='stable')
+    # columns: x, y, z (m), mean_tds, dem_m, log10(mean_tds), level
+    return np.column_stack([
+        points[order],
+        np.log10(points[order, 3]),
+        level[order],
+    ])
+
+def build_tds_volume(points, resolution):
+    # Resample log10(mean_tds) onto a regular 3-D grid for go.Isosurface and
+    # go.Volume. Grid points outside the data's convex hull get a value below
+    # the data minimum so any threshold range leaves them out.
+    xyz = points[:, :3]
+    log_tds = np.log10(points[:, 3])
+    axes = [
+        np.linspace(xyz[:, i].min(), xyz[:, i].max(), resolution)
+        for i in range(3)
+    ]
+    xi, yi, zi = np.meshgrid(*axes, indexing='ij')
+    values = griddata(xyz, log_tds, (xi, yi, zi))
+    values = np.where(np.isnan(values), log_tds.min() - 1, values)
+    # columns: x, y, z (m), log10(mean_tds), one row per grid point
+    return np.column_stack([xi.ravel(), yi.ravel(), zi.ravel(), values.ravel()])
+
+def build_cache():
+    os.makedirs(cache_dir, exist_ok=True)
+    for file_name in os.listdir(cache_dir):  # remove files of older builds
+        if not file_name.endswith(f'_{input_hash}.npy'):
+            os.remove(os.path.join(cache_dir, file_name))
+    points = read_points()
+    np.save(get_cache_path('points_lod'), build_lod(points))
+    np.save(
+        get_cache_path('tds_volume'),
+        build_tds_volume(points, tds_volume_resolution)
+    )
+    for level, resolution in dem_resolutions.items():
+        dem_axes, dem_z = build_dem(points, resolution)
+        np.save(get_cache_path(f'dem_axes_{level}'), dem_axes)
+        np.save(get_cache_path(f'dem_z_{level}'), dem_z)
+
+def load_array(name):
+    path = get_cache_path(name)
+    if not os.path.exists(path):
+        print('building grid cache')
+        build_cache()
+    return np.load(path, mmap_mode='r')
+
+def load_lod():
+    return load_array('points_lod')
+
+def load_tds_volume():
+    return load_array('tds_volume')
+
+def load_dem(level):
+    dem_axes = load_array(f'dem_axes_{level}')
+    return dem_axes[0], dem_axes[1], load_array(f'dem_z_{level}')
+
+input_hash = get_input_hash()
+
+if __name__ == '__main__':
+    build_cache()
+    print(f'grid cache written to {cache_dir}/, input hash {input_hash}')
@@ -5,6 +5,7 @@ import dash
 from dash import Dash, dcc, html, Input, Output
 import dash_mantine_components as dmc
 import os
+import shutil
 dash._dash_renderer._set_react_version('18.2.0')
 
 #----- GLOBALS ------------- ---------------------------------------------------
@@ -28,45 +29,107 @@ legend_font_size = 20
 date_fmt ='%m/%d/%Y'
 
 #----- GATHER AND CLEAN DATA ---------------------------------------------------
+# Ingest: csv -> df.parquet -> parquet store partitioned by EMISSION. Each step
+# only runs when its output is missing, the store is also rebuilt when
+# df.parquet is newer than it.
+csv_data_source = 'europe_monthly_electricity.csv' 
 parquet_data_source = 'df.parquet'
-if os.path.exists(parquet_data_source): # use pre-cleaned parquet file
-    print(f'Reading data from {parquet_data_source}')
-    df = pl.read_parquet(parquet_data_source)
+parquet_store = 'df_by_emission'  # hive partitioned, one folder per EMISSION
 
-else:  # read data from csv and clean
-    csv_data_source = 'europe_monthly_electricity.csv' 
-    print(f'Reading data from {csv_data_source}')
+def store_is_current():
+    ''' store exists and no file in it is older than df.parquet '''
+    if not os.path.exists(parquet_store):
+        return False
+    if not os.path.exists(parquet_data_source):
+        return True
+    store_mtime = min(
+        (
+            os.path.getmtime(os.path.join(root, file_name))
+            for root, _, file_names in os.walk(parquet_store)
+            for file_name in file_names
+        ),
+        default=0,   # an empty store is rebuilt
+    )
+    return store_mtime >= os.path.getmtime(parquet_data_source)
+
+if store_is_current(): # use pre-cleaned, partitioned parquet store
+    print(f'Reading data from {parquet_store}')
     df = (
-        pl.read_csv(
-            csv_data_source,
+        pl.read_parquet(f'{parquet_store}/**/*.parquet', hive_partitioning=True)
+        .with_columns(pl.col('EMISSION').cast(pl.Categorical))
+    )
+
+else:
+    if os.path.exists(parquet_data_source): # use pre-cleaned parquet file
+        print(f'Reading data from {parquet_data_source}')
+        df = pl.read_parquet(parquet_data_source)
+
+    else:  # scan csv lazily and stream the cleaned data to df.parquet
+        # the null ISO code and year filters are pushed down into the scan,
+        # only the listed columns are read and Date is parsed once
+        print(f'Reading data from {csv_data_source}')
+        (
+            pl.scan_csv(csv_data_source)
+            .select(
+                'Area', 'ISO 3 code', 'Date', 'EU', 'OECD', 'G20', 'G7', 
+                'Category', 'Subcategory', 'Variable', 'Unit', 'Value'
+            )
+            .with_columns(DATE = pl.col('Date').str.to_date(format=date_fmt))
+            .filter(
+                pl.col('ISO 3 code').is_not_null(),
+                pl.col('DATE').dt.year() > 2014,   # data is parse prior to 2015
             )
-        .select(
-            COUNTRY = pl.col('Area'),
-            ISO_3_CODE = pl.col('ISO 3 code'),
-            YEAR = pl.col('Date')
-                .str.to_date(format=date_fmt)
-                .dt.year(),
-            MONTH = pl.col('Date')
-                .str.to_date(format=date_fmt)
-                .dt.strftime("%b"),
-            MONTH_NUM = pl.col('Date')
-                .str.to_date(format=date_fmt)
-                .dt.month(),
-            DATE = pl.col('Date')
-                .str.to_date(format=date_fmt),
-            EU = pl.col('EU').cast(pl.Boolean),
-            OECD = pl.col('OECD').cast(pl.Boolean),
-            G20 = pl.col('G20').cast(pl.Boolean),
-            G7 = pl.col('G7').cast(pl.Boolean),
-            CAT = pl.col('Category').cast(pl.Categorical),
-            SUBCAT = pl.col('Subcategory').cast(pl.Categorical),
-            EMISSION = pl.col('Variable').cast(pl.Categorical),
-            UNIT = pl.col('Unit').cast(pl.Categorical),
-            VALUE = pl.col('Value'),
+            .select(
+                COUNTRY = pl.col('Area'),
+                ISO_3_CODE = pl.col('ISO 3 code'),
+                YEAR = pl.col('DATE').dt.year(),
+                MONTH = pl.col('DATE').dt.strftime("%b"),
+                MONTH_NUM = pl.col('DATE').dt.month(),
+                DATE = pl.col('DATE'),
+                EU = pl.col('EU').cast(pl.Boolean),
+                OECD = pl.col('OECD').cast(pl.Boolean),
+                G20 = pl.col('G20').cast(pl.Boolean),
+                G7 = pl.col('G7').cast(pl.Boolean),
+                CAT = pl.col('Category').cast(pl.Categorical),
+                SUBCAT = pl.col('Subcategory').cast(pl.Categorical),
+                EMISSION = pl.col('Variable').cast(pl.Categorical),
+                UNIT = pl.col('Unit').cast(pl.Categorical),
+                VALUE = pl.col('Value'),
+            )
+            .sink_parquet(parquet_data_source)
         )
-        .drop_nulls(subset='ISO_3_CODE') 
-        .filter(pl.col('YEAR') > 2014)   # data is parse prior to 2015
+        print(f'Wrote data to {parquet_data_source}')
+        df = pl.read_parquet(parquet_data_source)
+
+    print(f'Writing data to {parquet_store}')
+    if os.path.exists(parquet_store):  # partitions built from older data
+        shutil.rmtree(parquet_store)
+    df.write_parquet(parquet_store, partition_by='EMISSION')
+
+#----- PRECOMPUTED MONTH x YEAR MATRICES ---------------------------------------
+# monthly values pivoted by year for every (country, emission) pair, once
+df_month_year = (
+    df
+    .group_by('COUNTRY', 'EMISSION', 'MONTH', 'MONTH_NUM', 'YEAR')
+    .agg(pl.col('VALUE').sum())
+    .sort('YEAR')  # pivot year columns in ascending order
+    .pivot(
+        on='YEAR',
+        values='VALUE',
+        index=['COUNTRY', 'EMISSION', 'MONTH', 'MONTH_NUM'],
     )
+    .sort('COUNTRY', 'EMISSION', 'MONTH_NUM')
+)
+# {(country, emission): MONTH, MONTH_NUM, then one column per year with data}
+month_year_matrices = {
+    key: df_pair.select(
+        ['MONTH', 'MONTH_NUM'] + 
+        [c for c in df_pair.columns[2:] if df_pair[c].null_count() < df_pair.height]
+    )
+    for key, df_pair in df_month_year.partition_by(
+        ['COUNTRY', 'EMISSION'], as_dict=True, include_key=False
+    ).items()
+}
 
 #----- GLOBAL LISTS ------------------------------------------------------------
 country_list = df.get_column('COUNTRY').unique().sort().to_list()
@@ -75,16 +138,9 @@ emission_list = df.get_column('EMISSION').unique().sort().to_list()
 #----- FUNCTIONS----------------------------------------------------------------
 
 def get_px_line(country, emission):
-    df_local = (
-        df
-        .filter(pl.col('COUNTRY') == country)
-        .filter(pl.col('EMISSION') == emission)
-        .pivot(
-            on='YEAR',
-            values='VALUE',
-            index=['MONTH', 'MONTH_NUM'],
-            aggregate_function='sum'
-        )
+    df_local = month_year_matrices.get(
+        (country, emission),
+        pl.DataFrame(schema={'MONTH': pl.String, 'MONTH_NUM': pl.Int8})
     )
 
     year_cols = df_local.columns[2:]
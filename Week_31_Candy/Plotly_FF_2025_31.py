@@ -1,10 +1,11 @@
-import polars as pl
-import polars.selectors as cs
 import plotly.express as px
 import dash_ag_grid as dag
 import dash
 from dash import Dash, dcc, html, Input, Output
 import dash_mantine_components as dmc
+from candy_data import (
+    df, attribute_list, outcome_list, candy_slices, candy_medians
+)
 dash._dash_renderer._set_react_version('18.2.0')
 
 #----- GLOBALS -----------------------------------------------------------------
@@ -42,25 +43,7 @@ color1='rgba(0, 123, 255, 0.6)'  # blue
 color2='rgba(255, 159, 64, 0.6)' # orange
 
 #----- GATHER AND CLEAN DATA ---------------------------------------------------
-df = (
-    pl.read_csv('candy-data.csv')
-    .rename(lambda c: c.upper()) # all column names to upper case
-    .rename({                    # renames to reduce size of long names
-        'COMPETITORNAME'   : 'CANDY', 
-        'SUGARPERCENT'     : 'SUGAR_PCT',
-        'PRICEPERCENT'     : 'PRICE_PCT',
-        'WINPERCENT'       : 'WIN_PCT',
-        'PEANUTYALMONDY'   : 'PEANUT_ALMOND',
-        'CRISPEDRICEWAFER' : 'CRISP_RICE_WAF',
-    })
-    # Sugar and Price - change Percentage ranges from 1 max to 100 max
-    .with_columns(pl.col('SUGAR_PCT', 'PRICE_PCT')*100.0) 
-    .with_columns(cs.integer().cast(pl.UInt8))  # columns with 0's and 1's only
-    .with_columns(cs.float().cast(pl.Float32))  # percents don't need Float64
-)
-# next 2 lines use polars column selectors to group by type - easy and powerful
-attribute_list = sorted(df.select(cs.integer()).columns)
-outcome_list = sorted(df.select(cs.float()).columns)
+# data is cleaned and summarized once in candy_data.py, see the import above
 
 #----- DASH COMPONENTS------ ---------------------------------------------------
 dmc_select_attribute = (
@@ -127,10 +110,6 @@ def get_ag_col_defs(columns):
         })
     return ag_col_defs
  
-def get_median(df, attribute, filter, outcome):
-    ''' return median value for specific attribute, outcome '''
-    return df.filter(pl.col(attribute) == filter)[outcome].median()
-
 def get_subtitle(outcome, direction, pct_color, median_shift):
     ''' return complex subtitle with f-strings and html color'''
     return (
@@ -139,40 +118,30 @@ def get_subtitle(outcome, direction, pct_color, median_shift):
         f'{abs(median_shift):.1f}%</span></b>'
     )
 
-def get_box_plot(attribute, outcome):
-    ''' returns plotly graph objects box_plot, created with px.box API '''
-    
-    df_box = ( # make data frame for this attribute, outcome
-        df
-        .select(attribute, outcome)
-        .with_columns(
-            pl.col(attribute)
-            .cast(pl.String())
-            .replace('0', f'NO {attribute}')
-            .replace('1', f'HAS {attribute}')
-        )
-        .with_columns(MEDIAN = pl.col(outcome).median().over(attribute))
-        .sort(attribute, descending=True)
-    )
-    no_median = get_median(df_box, attribute, f'NO {attribute}',  outcome)
-    has_median = get_median(df_box,attribute, f'HAS {attribute}', outcome)
-    median_shift = has_median - no_median
+def get_title(attribute, outcome):
+    ''' return title and subtitle, using the precomputed median shift '''
+    median_shift = candy_medians[(attribute, outcome)]['MEDIAN_SHIFT']
     direction='decreased'
     pct_color = 'red'
     if median_shift > 0.0:
         direction='increased'
         pct_color = 'green'
+    return (
+        f'<b>EFFECT OF {attribute} ON {outcome}</b><br>' +
+        get_subtitle(outcome, direction, pct_color, median_shift)
+    )
 
+def get_box_plot(attribute, outcome):
+    ''' returns plotly graph objects box_plot, created with px.box API '''
+    
     fig = px.box(
-        df_box,
-        x=attribute,
-        y=outcome,
+        candy_slices[(attribute, outcome)],  # pre-labelled, from candy_data
+        x='ATTR_LABEL',
+        y='VALUE',
+        labels={'ATTR_LABEL': attribute, 'VALUE': outcome},
         template='plotly_white',
-        title=(
-            f'<b>EFFECT OF {attribute} ON {outcome}</b><br>' +
-            get_subtitle(outcome, direction, pct_color, median_shift)
-        ),
-        color=attribute,
+        title=get_title(attribute, outcome),
+        color='ATTR_LABEL',
         color_discrete_map = {
             f'NO {attribute}' : color1,
             f'HAS {attribute}' : color2,
@@ -192,39 +161,17 @@ def get_box_plot(attribute, outcome):
 def get_histogram(attribute, outcome):
     ''' returns plotly graph objects histogram, created with px.box API '''
     
-    df_hist = (  # make data frame for this attribute, outcome
-        df
-        .select(attribute, outcome)
-        .with_columns(
-            pl.col(attribute)
-            .cast(pl.String())
-            .str.replace('0', f'NO {attribute}')
-            .str.replace('1', f'HAS {attribute}')
-        )
-        .sort(attribute, descending=True)
-    )
-    no_median = get_median(df_hist, attribute, f'NO {attribute}',  outcome)
-    has_median = get_median(df_hist,attribute, f'HAS {attribute}', outcome)
-    median_shift = has_median - no_median
-
-    direction='decreased'
-    pct_color = 'red'
-    if median_shift > 0.0:
-        direction='increased'
-        pct_color = 'green'
     fig = px.histogram(
-        df_hist, 
-        x=outcome, 
-        color=attribute,
+        candy_slices[(attribute, outcome)],  # pre-labelled, from candy_data
+        x='VALUE', 
+        color='ATTR_LABEL',
+        labels={'ATTR_LABEL': attribute, 'VALUE': outcome},
         color_discrete_map = {
             f'NO {attribute}' : color1,
             f'HAS {attribute}' : color2,
         },
         template='plotly_white',
-        title=(
-            f'<b>EFFECT OF {attribute} ON {outcome}</b><br>' +
-            get_subtitle(outcome, direction, pct_color, median_shift)
-        ),
+        title=get_title(attribute, outcome),
     )
     # Update layout for overlay and transparency
     fig.update_layout(
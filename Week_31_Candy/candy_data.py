@@ -0,0 +1,74 @@
+import polars as pl
+import polars.selectors as cs
+# Ingest step shared by app.py and Plotly_FF_2025_31.py. Reads and cleans the
+# candy data once, then precomputes everything the box plot, histogram and
+# subtitles need for each (attribute, outcome) pair.
+
+#----- GATHER AND CLEAN DATA ---------------------------------------------------
+df = (
+    pl.read_csv('candy-data.csv')
+    .rename(lambda c: c.upper()) # all column names to upper case
+    .rename({                    # renames to reduce size of long names
+        'COMPETITORNAME'   : 'CANDY',
+        'SUGARPERCENT'     : 'SUGAR_PCT',
+        'PRICEPERCENT'     : 'PRICE_PCT',
+        'WINPERCENT'       : 'WIN_PCT',
+        'PEANUTYALMONDY'   : 'PEANUT_ALMOND',
+        'CRISPEDRICEWAFER' : 'CRISP_RICE_WAF',
+    })
+    # Sugar and Price - change Percentage ranges from 1 max to 100 max
+    .with_columns(pl.col('SUGAR_PCT', 'PRICE_PCT')*100.0)
+    .with_columns(cs.integer().cast(pl.UInt8))  # columns with 0's and 1's only
+    .with_columns(cs.float().cast(pl.Float32))  # percents don't need Float64
+)
+# next 2 lines use polars column selectors to group by type - easy and powerful
+attribute_list = sorted(df.select(cs.integer()).columns)
+outcome_list = sorted(df.select(cs.float()).columns)
+
+#----- PRECOMPUTED TABLES ------------------------------------------------------
+# long form, one row per candy, attribute and outcome, with the attribute
+# value already labelled as NO {attribute} or HAS {attribute}
+df_long = (
+    df
+    .unpivot(
+        on=attribute_list,
+        index=['CANDY'] + outcome_list,
+        variable_name='ATTRIBUTE',
+        value_name='ATTR_VALUE'
+    )
+    .unpivot(
+        on=outcome_list,
+        index=['CANDY', 'ATTRIBUTE', 'ATTR_VALUE'],
+        variable_name='OUTCOME',
+        value_name='VALUE'
+    )
+    .with_columns(
+        ATTR_LABEL = (
+            pl.when(pl.col('ATTR_VALUE') == 1)
+            .then(pl.lit('HAS ') + pl.col('ATTRIBUTE'))
+            .otherwise(pl.lit('NO ') + pl.col('ATTRIBUTE'))
+        )
+    )
+    .sort('ATTRIBUTE', 'OUTCOME', 'ATTR_VALUE')  # NO {attribute} rows first
+)
+# {(attribute, outcome): dataframe} for the box plot and histogram
+candy_slices = df_long.partition_by(
+    ['ATTRIBUTE', 'OUTCOME'], as_dict=True, include_key=False
+)
+
+# median outcome without and with each attribute, and the shift between them
+df_medians = (
+    df_long
+    .group_by('ATTRIBUTE', 'OUTCOME')
+    .agg(
+        NO_MEDIAN = pl.col('VALUE').filter(pl.col('ATTR_VALUE') == 0).median(),
+        HAS_MEDIAN = pl.col('VALUE').filter(pl.col('ATTR_VALUE') == 1).median(),
+    )
+    .with_columns(MEDIAN_SHIFT = pl.col('HAS_MEDIAN') - pl.col('NO_MEDIAN'))
+    .sort('ATTRIBUTE', 'OUTCOME')
+)
+# {(attribute, outcome): {NO_MEDIAN, HAS_MEDIAN, MEDIAN_SHIFT, ...}}
+candy_medians = {
+    (row['ATTRIBUTE'], row['OUTCOME']): row
+    for row in df_medians.iter_rows(named=True)
+}
@@ -4,10 +4,11 @@ import polars.selectors as cs
 import plotly.express as px
 import dash_ag_grid as dag
 import dash
-from dash import Dash, dcc, html, Input, Output
+from dash import Dash, dcc, html, Input, Output, ctx
 import dash_mantine_components as dmc
 import dash_bootstrap_components as dbc
 import os
+from ff_components import get_map_figure
 dash._dash_renderer._set_react_version('18.2.0')
 # ---- NOTES ABOUT THIS DATASET ------------------------------------------------
 # California ports Calexico and Calexico East are at the same location. I merged
@@ -193,7 +194,6 @@ def get_port_map(selected_state):
         center={'lat':center_lat, 'lon':center_lon},
         zoom=zoom_level[selected_state],
         title=(f'Port Map of {selected_state}'),
-        map_style='basic',  # Map Libre
         opacity=0.75,
         template=fig_template,
         custom_data=['PORT_STATE', 'ENTRY_NUM',],
@@ -370,7 +370,11 @@ def update(selected_state, group_by):
         selected_state = 'California'
     else:
         selected_state = selected_state['points'][-1]['customdata'][0]
-    port_map = get_port_map(selected_state)
+    if ctx.triggered_id == 'group-by':  # state plots are unchanged
+        return dash.no_update, get_line_group_by(group_by), dash.no_update
+    port_map = get_map_figure(   # Map Libre basic style, cached per state
+        selected_state, lambda: get_port_map(selected_state), 'basic'
+    )
     line_group_by = get_line_group_by(group_by)
     port_data_fig = get_state_ports(selected_state)
     return port_map, line_group_by, port_data_fig
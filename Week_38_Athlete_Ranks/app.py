@@ -13,8 +13,8 @@ dash._dash_renderer._set_react_version('18.2.0')
     added column RANK_MED is the median rank of each athlete
     added column RANK_MEAN is the mean rank of each athlete
     athletes within each league are ranked by RANK_MED, and then by RANK_MEAN.
-    The top 5 athletes are included in this dashboard. Could be ehanced for 
-    analysis of lower ranked athletes
+    RANK_LEAGUE is kept for every athlete, the dashboard shows the top N 
+    athletes of each selected league, 5 by default.
 '''
 
 viz_template = 'plotly_dark'
@@ -68,22 +68,60 @@ df  = (
     .join(df_league_names, on = 'LEAGUE_ABBR', how='left')
 )
 
-top_5_list = sorted(list(
+#----- RANKING TABLE AND LEAGUE-PARTITIONED STORE ------------------------------
+df_ranks = (   # one row per athlete, RANK_LEAGUE is 1 for the best in a league
     df
-    .lazy()
-    .unique('NAME_ORG')    
-    .sort('LEAGUE_ABBR', 'RANK_MED', 'RANK_MEAN')
+    .unique('NAME_ORG')
+    .sort('LEAGUE_ABBR', 'RANK_MED', 'RANK_MEAN', 'NAME_ORG')
     .with_columns(
         RANK_LEAGUE = 
             pl.col('LEAGUE_ABBR')
             .cum_count()
             .over('LEAGUE_ABBR')
-            .cast(pl.UInt8)
+            .cast(pl.UInt16)
         )
-    .filter(pl.col('RANK_LEAGUE') <= 5)
-    .collect()
-    ['NAME_ORG']
-))
+    .select(
+        'LEAGUE_NAME', 'NAME_ORG', 'FAMILY_NAME', 
+        'RANK_MED', 'RANK_MEAN', 'RANK_LEAGUE'
+    )
+)
+# {league name: athletes of the league in RANK_LEAGUE order}
+league_ranks = {
+    league: df_league 
+    for (league,), df_league 
+    in df_ranks.partition_by('LEAGUE_NAME', as_dict=True).items()
+}
+# {league name: yearly rows of the league, best ranked athletes first}, so the
+# rows of the top N athletes are the first league_row_ends[league][N-1] rows
+league_data = {
+    league: df_league.sort('RANK_LEAGUE', 'YEAR')
+    for (league,), df_league in (
+        df
+        .join(df_ranks.select('NAME_ORG', 'RANK_LEAGUE'), on='NAME_ORG')
+        .partition_by('LEAGUE_NAME', as_dict=True)
+        .items()
+    )
+}
+league_row_ends = {
+    league: (
+        df_league
+        .group_by('RANK_LEAGUE')
+        .len()
+        .sort('RANK_LEAGUE')
+        ['len']
+        .cum_sum()
+        .to_list()
+    )
+    for league, df_league in league_data.items()
+}
+
+def get_top_n(league, top_n):
+    ''' yearly rows and names of the top_n athletes of a league, as slices '''
+    top_n = min(top_n, len(league_ranks[league]))
+    return (
+        league_data[league].head(league_row_ends[league][top_n - 1]),
+        league_ranks[league].head(top_n)
+    )
 
 # #----- FUNCTIONS ---------------------------------------------------------------
 def get_tl_by_year(df_callback, name_org_list):
@@ -153,6 +191,15 @@ dmc_select_league = dmc.Box([
         ),
     ])
 
+dmc_top_n = dmc.NumberInput(
+    label='Athletes per league',
+    id='top-n',
+    value=5,
+    min=1,
+    step=1,
+    w=150,
+)
+
 dmc_selected_leagues = dmc.GridCol(
     dmc.GridCol(
         dmc.Text(
@@ -167,12 +214,15 @@ server = app.server
 app.layout =  dmc.MantineProvider([
     html.Hr(style=style_horizontal_thick_line),
     dmc.Text(
-        'Consistency - top 5 athletes per league', 
+        'Consistency - top athletes per league', 
         ta='center', 
         style=style_h2
     ),
     html.Hr(style=style_horizontal_thick_line),
-    dmc.Grid(children = [dmc.GridCol(dmc_select_league, span=8, offset = 1)]),
+    dmc.Grid(children = [
+        dmc.GridCol(dmc_select_league, span=8, offset = 1),
+        dmc.GridCol(dmc_top_n, span=2, offset = 0),
+    ]),
     dmc.Grid(children = [
         dmc.GridCol(dmc_selected_leagues, span=8, offset = 1)]),
     dmc.Grid(children = [
@@ -185,21 +235,22 @@ app.layout =  dmc.MantineProvider([
     Output('selected_leagues', 'children'), 
     Output('by-year', 'figure'), 
     Output('by-career-year', 'figure'), 
-    Input('select-leagues', 'value')
+    Input('select-leagues', 'value'),
+    Input('top-n', 'value'),
 )
-def choose_framework(value):
-    df_callback=(
-        df
-        .filter(pl.col('LEAGUE_NAME').is_in(value))
-        .filter(pl.col('NAME_ORG').is_in(top_5_list))
-    )
-    name_org_list = (
-        df_callback
-        .unique('NAME_ORG')
-        .sort('LEAGUE_NAME', 'FAMILY_NAME')
-        ['NAME_ORG']
-        .to_list()
-    )
+def choose_framework(value, top_n):
+    top_n = max(int(top_n or 1), 1)
+    if not value:   # no league selected
+        df_callback, name_org_list = df.clear(), []
+    else:
+        league_slices = [get_top_n(league, top_n) for league in value]
+        df_callback = pl.concat([df_rows for df_rows, _ in league_slices])
+        name_org_list = (
+            pl.concat([df_names for _, df_names in league_slices])
+            .sort('LEAGUE_NAME', 'FAMILY_NAME')
+            ['NAME_ORG']
+            .to_list()
+        )
     tl_by_year= get_tl_by_year(df_callback, name_org_list)
     tl_by_career_year= get_tl_by_career_year(df_callback, name_org_list)
     return  (
@@ -1,12 +1,14 @@
 import polars as pl
 import polars.selectors as cs
+import numpy as np
 import os
 import plotly.express as px
 import plotly.graph_objects as go
 import dash
-from dash import Dash, dcc, html, Input, Output
+from dash import Dash, dcc, html, Input, Output, State, ctx
 import dash_mantine_components as dmc
 import dash_ag_grid as dag
+from ff_components import get_map_figure, get_map_style_patch
 dash._dash_renderer._set_react_version('18.2.0')
 #  Dataset has 10 unique customers & locations, 92 unique customer/locatio pairs
 #  dropped the HOUR and MINUTE fields, data grouped by ID, DATE, LONG/LAT
@@ -30,6 +32,8 @@ map_types = [
     'dark', 'light', 'open-street-map', 'outdoors', 'satellite', 
     'satellite-streets', 'streets', 'white-bg']
 
+timeline_periods = ['Day', 'Week', 'Month']
+store_file = 'passages_by_counter.npy'  # UInt16 passages, counter x date
 
 #----- DASH COMPONENTS------ ---------------------------------------------------
 dmc_select_map_style = (
@@ -44,6 +48,17 @@ dmc_select_map_style = (
     ),
 )
 
+dmc_select_timeline_period = (
+    dmc.Select(
+        label='Timeline resolution',
+        id='timeline-period',
+        data=timeline_periods,
+        value='Week',
+        searchable=False,
+        clearable=False,
+        size='sm',
+    ),
+)
 
 if 'df.parquet' in os.listdir('.'):
     print('reading dataset from parquet file')
@@ -78,11 +93,67 @@ else:
     )
     df.write_parquet('df.parquet')
 
-def get_scatter_map(map_style):
-    # Create the scatter map
-    # replaced midpoints of lat, long with median values to suppress outliers
-    median_lat = df['LAT'].median()
-    median_lon = df['LON'].median()
+#----- PER-COUNTER TIME SERIES STORE -------------------------------------------
+# One contiguous row of daily passages per counter on a shared date axis,
+# memory-mapped from store_file. Days without data are 0.
+counter_ids = np.sort(df['ID'].unique().to_numpy())
+counter_locs = dict(df.unique('ID').select('ID', 'LOC').iter_rows())
+date_axis = np.arange(
+    np.datetime64(df['DATE'].min(), 'D'),
+    np.datetime64(df['DATE'].max(), 'D') + 1,
+)
+
+def build_store():
+    store = np.lib.format.open_memmap(
+        store_file, mode='w+', dtype=np.uint16,
+        shape=(len(counter_ids), len(date_axis))
+    )
+    store[:] = 0
+    rows = np.searchsorted(counter_ids, df['ID'].to_numpy())
+    cols = (df['DATE'].to_numpy().astype('datetime64[D]') - date_axis[0]).astype(int)
+    store[rows, cols] = df['PASSAGES'].to_numpy()
+    store.flush()
+
+def store_is_current():
+    ''' store exists, is newer than df.parquet and matches its counters/dates '''
+    if (
+        not os.path.exists(store_file)
+        or os.path.getmtime(store_file) < os.path.getmtime('df.parquet')
+    ):
+        return False
+    shape = np.load(store_file, mmap_mode='r').shape
+    return shape == (len(counter_ids), len(date_axis))
+
+if not store_is_current():
+    print(f'writing {store_file}')
+    build_store()
+passages_store = np.load(store_file, mmap_mode='r')
+
+def get_period_starts(period_keys):
+    ''' indexes on date_axis where a new period starts '''
+    return np.flatnonzero(np.r_[True, period_keys[1:] != period_keys[:-1]])
+
+period_starts = {   # weeks start on Monday, 1970-01-05 was a Monday
+    'Day': np.arange(len(date_axis)),
+    'Week': get_period_starts(
+        (date_axis - np.datetime64('1970-01-05', 'D')).astype(int) // 7
+    ),
+    'Month': get_period_starts(date_axis.astype('datetime64[M]')),
+}
+
+def get_counter_series(counter_id, period):
+    ''' dates and summed passages of one counter, by Day, Week or Month '''
+    starts = period_starts[period]
+    row = np.searchsorted(counter_ids, counter_id)
+    passages = np.add.reduceat(passages_store[row].astype(np.uint32), starts)
+    return date_axis[starts], passages
+
+# replaced midpoints of lat, long with median values to suppress outliers
+median_lat = df['LAT'].median()
+median_lon = df['LON'].median()
+
+def get_scatter_map():
+    # Create the scatter map, map style is set by get_map_figure
     fig = px.scatter_map(
         df.unique('ID'),
         lat='LAT', lon='LON',
@@ -90,7 +161,6 @@ def get_scatter_map(map_style):
         color='PASSAGES_BY_ID', 
         zoom=11,
         center={'lat':median_lat, 'lon':median_lon},  
-        map_style=map_style,
         opacity=0.75,
         custom_data=['LOC', 'NEARBY', 'PASSAGES_BY_ID', 'ID'],
         height=800, width=1200
@@ -109,6 +179,25 @@ def get_scatter_map(map_style):
     fig.update(layout_coloraxis_showscale=False)
     return fig
 
+def get_timeline(timeline_ids, period):
+    fig = go.Figure()
+    for counter_id in timeline_ids:
+        dates, passages = get_counter_series(counter_id, period)
+        fig.add_trace(go.Scatter(
+            x=dates, y=passages,
+            mode='lines',
+            name=f'{counter_locs[counter_id]} ({counter_id})',
+        ))
+    fig.update_layout(
+        title=dict(text=f'Bicycle passages by {period.lower()}, click a counter'),
+        template='simple_white',
+        hovermode='x unified',
+        showlegend=True,
+        yaxis_title='PASSAGES',
+        height=400, width=1200
+    )
+    return fig
+
 # #----- DASH APPLICATION STRUCTURE---------------------------------------------
 app = Dash()
 server = app.server
@@ -118,18 +207,41 @@ app.layout =  dmc.MantineProvider([
     html.Hr(style=style_horizontal_thick_line),
     dmc.Grid(children = [
         dmc.GridCol(dmc_select_map_style, span=2, offset = 1),
+        dmc.GridCol(dmc_select_timeline_period, span=2, offset = 0),
     ]),  
     dmc.Grid(children = [
             dmc.GridCol(dcc.Graph(id='scatter-map'), span=10, offset=1),          
         ]),
+    dmc.Grid(children = [
+            dmc.GridCol(dcc.Graph(id='timeline'), span=10, offset=1),          
+        ]),
+    dcc.Store(id='timeline-ids', data=[]),  # counters clicked on the map
 ])
 @app.callback(
     Output('scatter-map', 'figure'),
     Input('map-style', 'value'),
 )
 def callback(map_style):
-    scatter_map=get_scatter_map(map_style)
-    return scatter_map
+    if ctx.triggered_id == 'map-style':  # traces stay, only the style changes
+        return get_map_style_patch(map_style)
+    return get_map_figure('counters', get_scatter_map, map_style)
+
+@app.callback(
+    Output('timeline', 'figure'),
+    Output('timeline-ids', 'data'),
+    Input('scatter-map', 'clickData'),
+    Input('timeline-period', 'value'),
+    State('timeline-ids', 'data'),
+)
+def update_timeline(click_data, period, timeline_ids):
+    # clicking a counter adds its timeline, clicking it again removes it
+    if ctx.triggered_id == 'scatter-map' and click_data:
+        counter_id = click_data['points'][0]['customdata'][3]
+        if counter_id in timeline_ids:
+            timeline_ids.remove(counter_id)
+        else:
+            timeline_ids.append(counter_id)
+    return get_timeline(timeline_ids, period), timeline_ids
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
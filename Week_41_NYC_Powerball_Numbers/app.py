@@ -2,8 +2,9 @@ import polars as pl
 import os
 import plotly.express as px
 import dash
-from dash import Dash, dcc, html, Input, Output
+from dash import Dash, dcc, html, Input, Output, State
 import dash_mantine_components as dmc
+from ff_components import add_template_relayout
 dash._dash_renderer._set_react_version('18.2.0')
 
 #----- GLOBALS -----------------------------------------------------------------
@@ -20,11 +21,13 @@ template_list = ['ggplot2', 'seaborn', 'simple_white', 'plotly','plotly_white',
 
 #----- LOAD AND CLEAN THE DATASET ----------------------------------------------
 source_data = 'Lottery_Powerball_Winning_Numbers__Beginning_2010.csv'
+csv_ingest = False   # sidecar files are rebuilt when the csv is read again
 if 'powerball.parquet' in os.listdir('.'):
     print('reading data from parquet file')
     df = pl.read_parquet('powerball.parquet')
 else:
     print('reading data from csv file')
+    csv_ingest = True
     df = (
         pl.scan_csv(source_data)
         .with_columns(
@@ -60,6 +63,44 @@ else:
     )
     df.write_parquet('powerball.parquet')
 
+#----- PRECOUNTED BINS AND TIME AGGREGATES -------------------------------------
+def read_sidecar(file_name, build):
+    ''' read a table saved next to powerball.parquet, build it if needed '''
+    if not csv_ingest and file_name in os.listdir('.'):
+        return pl.read_parquet(file_name)
+    print(f'writing {file_name}')
+    df_sidecar = build()
+    df_sidecar.write_parquet(file_name)
+    return df_sidecar
+
+def get_bins():
+    ''' number of draws of each winning number, by PICK '''
+    return (
+        df
+        .group_by('PICK', 'POWERBALL_NUM')
+        .agg(COUNT = pl.len())
+        .sort('PICK', 'POWERBALL_NUM')
+    )
+
+df_wide = df.pivot('PICK', index='DATE', values='POWERBALL_NUM')
+
+def get_time_agg(every):
+    ''' mean winning number of every PICK, by time window '''
+    return (
+        df_wide
+        .sort('DATE')
+        .group_by_dynamic('DATE', every=every, closed='left', period=every)
+        .agg(pl.col(pick_list).mean())
+    )
+
+df_bins = read_sidecar('powerball_bins.parquet', get_bins)
+time_agg_frames = {  # aggregation choice: DATE and one column per PICK
+    'None': df_wide,
+    'Week': read_sidecar('powerball_week.parquet', lambda: get_time_agg('1w')),
+    'Month': read_sidecar('powerball_month.parquet', lambda: get_time_agg('1mo')),
+    'Year': read_sidecar('powerball_year.parquet', lambda: get_time_agg('1y')),
+}
+
 #----- DASH COMPONENTS------ ---------------------------------------------------
 dmc_select_data = (
     dmc.MultiSelect(
@@ -97,18 +138,20 @@ dmc_select_aggregation = (
     ),
 )
 
-def get_histogram(df, pick, my_template):
-    df_hist = df.filter(pl.col('PICK').is_in(pick))
-    fig = px.histogram(
+def get_histogram(pick, my_template):
+    df_hist = df_bins.filter(pl.col('PICK').is_in(pick))
+    fig = px.bar(    # bars of precounted bins, one per winning number
         df_hist,
         x='POWERBALL_NUM',
+        y='COUNT',
         color='PICK', 
+        category_orders={'PICK': pick_list},
         opacity=0.5,
         template=my_template,
-        nbins=69
     )
 
     fig.update_layout(
+        bargap=0,
         showlegend=True,
         title=dict(
             text=(
@@ -121,27 +164,9 @@ def get_histogram(df, pick, my_template):
     )
     return fig
 
-def get_line_plot(df, pick, my_template, aggregation):
-    df_line = (
-        df
-        .filter(pl.col('PICK').is_in(pick))
-        .pivot(
-            'PICK',
-            index='DATE',
-            values='POWERBALL_NUM'
-        )
-    )
-    show_markers = False
-    if aggregation == 'Week':
-        df_line = df_line.group_by_dynamic(
-            'DATE', every='1w', closed='left', period='7d').agg(pl.col(pick).mean())
-    elif aggregation == 'Month':
-        df_line = df_line.group_by_dynamic(
-            'DATE', every='1mo', closed='left', period='1mo').agg(pl.col(pick).mean())
-    elif aggregation == 'Year':
-        df_line = df_line.group_by_dynamic(
-            'DATE', every='1y', closed='left', period='1y').agg(pl.col(pick).mean())
-        show_markers=True
+def get_line_plot(pick, my_template, aggregation):
+    df_line = time_agg_frames.get(aggregation, df_wide).select('DATE', *pick)
+    show_markers = aggregation == 'Year'
 
     fig = px.line(
         df_line,
@@ -211,15 +236,24 @@ app.layout =  dmc.MantineProvider([
     Output('histogram', 'figure'),
     Output('line_plot', 'figure'),
     Input('pick', 'value'),
-    Input('template', 'value'),
-    Input('aggregation', 'value')
+    Input('aggregation', 'value'),
+    State('template', 'value'),
 )
-def callback(pick, template, aggregation):
+def callback(pick, aggregation, template):
+    # template changes are made in the browser, see add_template_relayout below
     if not isinstance(pick, list):  # if value is not a list, make it one
         pick = [pick]   
-    histogram = get_histogram(df, pick, template)
-    line_plot = get_line_plot(df, pick, template, aggregation)
+    histogram = get_histogram(pick, template)
+    line_plot = get_line_plot(pick, template, aggregation)
     return histogram, line_plot
 
+add_template_relayout(   # px colors follow the colorway of the new template
+    app,
+    'template',
+    ['histogram', 'line_plot'],
+    template_list,
+    recolor=True,
+)
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
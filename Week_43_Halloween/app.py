@@ -4,8 +4,9 @@ import os
 import plotly.express as px
 import plotly.graph_objects as go
 import dash
-from dash import Dash, dcc, html, Input, Output
+from dash import Dash, dcc, html, Input, Output, State, ctx
 import dash_mantine_components as dmc
+from ff_components import add_template_relayout
 dash._dash_renderer._set_react_version('18.2.0')
 
 #----- GLOBALS -----------------------------------------------------------------
@@ -29,6 +30,12 @@ dmc_text_red = {
 dmc_text_gray = dmc_text_red.copy()
 dmc_text_gray['color'] = 'gray'
 
+slide_count = 13
+slide_cache = {}   # {(template, slide_number): figure}, filled as slides are viewed
+# slides 11 and 12 take their trace color from the template, so a template
+# change re-renders them on the server, the others are re-themed in the browser
+template_colored_slides = [11, 12]
+
 
 {'fontSize':'16px', 'color':'gray', 'textAlign':'left','marginLeft':'100px'},
 #----- LOAD AND CLEAN THE DATASET ----------------------------------------------
@@ -143,8 +150,8 @@ def get_carousel_slide(reviewer_text, id):
     )
     return slide
 
-def update_fig(fig, slide_number, template):
-    updated_fig = go.Figure(fig)
+def update_fig(updated_fig, slide_number):
+    ''' apply the changes of one slide, in place, to a copy of the previous one '''
     if slide_number == 2:   # change the plot title
         updated_fig.update_layout(
             title=dict(
@@ -261,73 +268,6 @@ def update_fig(fig, slide_number, template):
                 ))
         )
 
-    if slide_number == 11:     # aggregate all time points, single trace by year
-        updated_fig=px.line(
-            df_yearly,
-            x='YEAR',
-            y='TOTAL_COUNT',
-            template = template,
-            markers=True,
-            title='Total Halloween Trick-or-Treaters by Year',
-            height=400, width=800,
-            line_shape='spline',
-        )
-        updated_fig.update_traces(line=dict( width=1))
-        updated_fig.update_layout(margin=dict(l=0, r=0, t=50, b=0))
-        updated_fig.add_vline(
-            x=2020, 
-            line_width=2, 
-            line_dash='dash',
-            line_color='gray',
-            annotation_text='Covid-19 Pandemic',
-        )
-        updated_fig.add_vline(
-            x=2013, 
-            line_width=2, 
-            line_dash='dash',
-            line_color='gray',
-            annotation_text='1 inch of rain',
-        )
-        for i, year in enumerate([2022, 2023, 2024]):
-            year_count = (
-                df_yearly
-                .filter(pl.col('YEAR') == year)
-                .item(0, 'TOTAL_COUNT')
-            )
-            updated_fig.add_annotation(
-                x=year,xref='x', 
-                y=year_count, yref='y', 
-                text=f'{year_count}', showarrow=False, 
-                font=dict(color='gray', size=14), 
-                yshift=20
-                )
-        updated_fig.update_xaxes(title='')
-        updated_fig.update_layout(
-            xaxis=dict(
-                showline=True, 
-                linewidth=1, 
-                linecolor='gray',
-                mirror=False, 
-                ),
-            yaxis=dict(
-                showline=True, 
-                linewidth=1, 
-                linecolor='gray', 
-                mirror=False     
-                ),
-            title_y=0.97,
-        )
-        updated_fig.update_layout(
-            showlegend=False,
-            title=dict(
-                text=(
-                    'Halloween Trick-or-Treaters Aggregated by Year (TTT)<br>'
-                    f'<sup>Slide {slide_number}</sup>'
-                ))
-        )
-        updated_fig.update_xaxes(showgrid=False, zeroline=False)
-        updated_fig.update_yaxes(showgrid=False, zeroline=False)
-
     if slide_number == 12:   # aggregate time points, single trace by year
         updated_fig.add_trace(go.Scatter(
             x=df_future['YEAR'],
@@ -357,77 +297,165 @@ def update_fig(fig, slide_number, template):
                 ))
         )
 
-    if slide_number == 13:     # aggregate all time points, single trace by year
-        df_ordered_days = (
-            pl.DataFrame({
-                'DAY'     : ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'],
-                'DAY_NUM' : [    1,     2,     3,     4,     5,     6,     7],
-                'DAY_COLOR' : ['#d3d3d3']*5 + ['orange', '#d3d3d3'],
-            })
-        )
-        dict_day_color = dict(zip(
-            df_ordered_days['DAY'], 
-            df_ordered_days['DAY_COLOR']
-        ))
+    return updated_fig
 
-        df_avg_by_day = (
-            df
-            .with_columns(DAY_COUNT = (pl.col('DAY').len().over('DAY')/6))
-            .with_columns(
-                NORM_DAY_COUNT = (pl.col('COUNT')/(pl.col('DAY_COUNT'))))
-            .with_columns(
-                DAY_TOTAL = (pl.col('NORM_DAY_COUNT').sum().over('DAY')))
-            .unique(['DAY', 'DAY_TOTAL'])
-            .select(['DAY', 'DAY_TOTAL'])
-            .join(
-                df_ordered_days,
-                on='DAY',
-                how='left'
-            )
-            .sort('DAY_NUM')
+def get_fig_yearly(template):
+    ''' slide 11, aggregate all time points, single trace by year '''
+    fig=px.line(
+        df_yearly,
+        x='YEAR',
+        y='TOTAL_COUNT',
+        template = template,
+        markers=True,
+        title='Total Halloween Trick-or-Treaters by Year',
+        height=400, width=800,
+        line_shape='spline',
+    )
+    fig.update_traces(line=dict( width=1))
+    fig.update_layout(margin=dict(l=0, r=0, t=50, b=0))
+    fig.add_vline(
+        x=2020, 
+        line_width=2, 
+        line_dash='dash',
+        line_color='gray',
+        annotation_text='Covid-19 Pandemic',
+    )
+    fig.add_vline(
+        x=2013, 
+        line_width=2, 
+        line_dash='dash',
+        line_color='gray',
+        annotation_text='1 inch of rain',
+    )
+    for i, year in enumerate([2022, 2023, 2024]):
+        year_count = (
+            df_yearly
+            .filter(pl.col('YEAR') == year)
+            .item(0, 'TOTAL_COUNT')
         )
-        updated_fig=px.histogram(
-            df_avg_by_day,
-            x='DAY',
-            y='DAY_TOTAL',
-            color='DAY',
-            color_discrete_map=dict_day_color,
-            template = template,
-            title=(
-                '<b>Call to Action:</b>' +
-                'Halloween 2025 is on a Friday (tonight) -- time to shop<br>' + 
-                f'<sup>Slide {slide_number}</sup>'
+        fig.add_annotation(
+            x=year,xref='x', 
+            y=year_count, yref='y', 
+            text=f'{year_count}', showarrow=False, 
+            font=dict(color='gray', size=14), 
+            yshift=20
+            )
+    fig.update_xaxes(title='')
+    fig.update_layout(
+        xaxis=dict(
+            showline=True, 
+            linewidth=1, 
+            linecolor='gray',
+            mirror=False, 
             ),
-            height=400, width=800,
-        )
-        updated_fig.update_layout(
-            xaxis=dict(
-                showline=True, 
-                linewidth=1, 
-                linecolor='gray', 
-                mirror=False,
-                showgrid=False,      # show vertical grid lines
-                tickmode='linear',  # ensure ticks are evenly spaced
-                dtick=1             # one tick/gridline per category
-                ),
-            yaxis=dict(
-                showline=True, 
-                linewidth=1, 
-                linecolor='gray', 
-                mirror=False,
-                showgrid=False       # show horizontal grid lines
-                ),
-            title_y=0.97,
+        yaxis=dict(
+            showline=True, 
+            linewidth=1, 
+            linecolor='gray', 
+            mirror=False     
+            ),
+        title_y=0.97,
+    )
+    fig.update_layout(
+        showlegend=False,
+        title=dict(
+            text=(
+                'Halloween Trick-or-Treaters Aggregated by Year (TTT)<br>'
+                '<sup>Slide 11</sup>'
+            ))
+    )
+    fig.update_xaxes(showgrid=False, zeroline=False)
+    fig.update_yaxes(showgrid=False, zeroline=False)
+
+    return fig
+
+def get_fig_by_day(template):
+    ''' slide 13, normalized trick-or-treater count by day of week '''
+    df_ordered_days = (
+        pl.DataFrame({
+            'DAY'     : ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'],
+            'DAY_NUM' : [    1,     2,     3,     4,     5,     6,     7],
+            'DAY_COLOR' : ['#d3d3d3']*5 + ['orange', '#d3d3d3'],
+        })
+    )
+    dict_day_color = dict(zip(
+        df_ordered_days['DAY'], 
+        df_ordered_days['DAY_COLOR']
+    ))
+
+    df_avg_by_day = (
+        df
+        .with_columns(DAY_COUNT = (pl.col('DAY').len().over('DAY')/6))
+        .with_columns(
+            NORM_DAY_COUNT = (pl.col('COUNT')/(pl.col('DAY_COUNT'))))
+        .with_columns(
+            DAY_TOTAL = (pl.col('NORM_DAY_COUNT').sum().over('DAY')))
+        .unique(['DAY', 'DAY_TOTAL'])
+        .select(['DAY', 'DAY_TOTAL'])
+        .join(
+            df_ordered_days,
+            on='DAY',
+            how='left'
         )
-        updated_fig.update_xaxes(title='')
-        updated_fig.update_yaxes(title='NORMALIZED TRICK OR TREATER COJNT PER DAY')
-        updated_fig.update_layout(
-            margin=dict(l=0, r=0, t=50, b=0),showlegend=False)
-                    
-    return updated_fig
+        .sort('DAY_NUM')
+    )
+    fig=px.histogram(
+        df_avg_by_day,
+        x='DAY',
+        y='DAY_TOTAL',
+        color='DAY',
+        color_discrete_map=dict_day_color,
+        template = template,
+        title=(
+            '<b>Call to Action:</b>' +
+            'Halloween 2025 is on a Friday (tonight) -- time to shop<br>' + 
+            '<sup>Slide 13</sup>'
+        ),
+        height=400, width=800,
+    )
+    fig.update_layout(
+        xaxis=dict(
+            showline=True, 
+            linewidth=1, 
+            linecolor='gray', 
+            mirror=False,
+            showgrid=False,      # show vertical grid lines
+            tickmode='linear',  # ensure ticks are evenly spaced
+            dtick=1             # one tick/gridline per category
+            ),
+        yaxis=dict(
+            showline=True, 
+            linewidth=1, 
+            linecolor='gray', 
+            mirror=False,
+            showgrid=False       # show horizontal grid lines
+            ),
+        title_y=0.97,
+    )
+    fig.update_xaxes(title='')
+    fig.update_yaxes(title='NORMALIZED TRICK OR TREATER COJNT PER DAY')
+    fig.update_layout(
+        margin=dict(l=0, r=0, t=50, b=0),showlegend=False)
+
+    return fig
+
+def get_slide_fig(template, slide_number):
+    ''' figure for one slide, built once per template from the previous one '''
+    key = (template, slide_number)
+    if key not in slide_cache:
+        if slide_number == 1:
+            fig = get_fig(template)
+        elif slide_number == 11:
+            fig = get_fig_yearly(template)
+        elif slide_number == 13:
+            fig = get_fig_by_day(template)
+        else:
+            fig = go.Figure(get_slide_fig(template, slide_number - 1))
+            update_fig(fig, slide_number)
+        slide_cache[key] = fig
+    return slide_cache[key]
 
 # #----- DASH APPLICATION STRUCTURE---------------------------------------------
-fig=go.Figure()
 app = Dash()
 server = app.server
 app.layout =  dmc.MantineProvider([
@@ -436,7 +464,9 @@ app.layout =  dmc.MantineProvider([
     html.Hr(style=style_horizontal_thick_line), 
     dmc.Grid(children = [dmc.GridCol(select_template, span=3, offset = 1),]),  
     dmc.Space(h=50),
+    dcc.Store(id='slides-drawn', data=[]),  # indexes of slides already drawn
     dmc.Carousel(
+        id='carousel',
         withIndicators=False,
         height=500,
         slideGap='md',
@@ -518,40 +548,37 @@ app.layout =  dmc.MantineProvider([
 ])
 
 @app.callback(
-    Output('fig_01', 'figure'),
-    Output('fig_02', 'figure'),
-    Output('fig_03', 'figure'),
-    Output('fig_04', 'figure'),
-    Output('fig_05', 'figure'),
-    Output('fig_06', 'figure'),
-    Output('fig_07', 'figure'),
-    Output('fig_08', 'figure'),
-    Output('fig_09', 'figure'),
-    Output('fig_10', 'figure'),
-    Output('fig_11', 'figure'),
-    Output('fig_12', 'figure'),
-    Output('fig_13', 'figure'),
+    *[Output(f'fig_{n:02d}', 'figure') for n in range(1, slide_count + 1)],
+    Output('slides-drawn', 'data'),
+    Input('carousel', 'active'),
     Input('template', 'value'),
+    State('slides-drawn', 'data'),
+)
+def callback(active, template, slides_drawn):
+    fig_list = [dash.no_update] * slide_count
+    if ctx.triggered_id == 'template':
+        for i in slides_drawn:
+            if i + 1 in template_colored_slides:
+                fig_list[i] = get_slide_fig(template, i + 1)
+        return *fig_list, slides_drawn
+    # only the active slide and its neighbours are drawn, others wait until
+    # the carousel gets to them
+    active = active or 0
+    for i in range(max(active - 1, 0), min(active + 2, slide_count)):
+        if i not in slides_drawn:
+            fig_list[i] = get_slide_fig(template, i + 1)
+            slides_drawn.append(i)
+    return *fig_list, slides_drawn
+
+add_template_relayout(   # slides with explicit trace colors
+    app,
+    'template',
+    [
+        f'fig_{n:02d}' for n in range(1, slide_count + 1)
+        if n not in template_colored_slides
+    ],
+    template_list
 )
-def callback(template):
-    fig_01 = get_fig(template)
-    fig_02 = update_fig(fig_01, 2, template)
-    fig_03 = update_fig(fig_02, 3, template)
-    fig_04 = update_fig(fig_03, 4, template)
-    fig_05 = update_fig(fig_04, 5, template)
-    fig_06 = update_fig(fig_05, 6, template)
-    fig_07 = update_fig(fig_06, 7, template)
-    fig_08 = update_fig(fig_07, 8, template)
-    fig_09 = update_fig(fig_08, 9, template)
-    fig_10 = update_fig(fig_09, 10, template)
-    fig_11 = update_fig(fig_10, 11, template)
-    fig_12 = update_fig(fig_11, 12, template)
-    fig_13 = update_fig(fig_12, 13, template)
-    
-    return (
-        fig_01, fig_02, fig_03, fig_04, fig_05, fig_06, fig_07, fig_08,
-        fig_09, fig_10, fig_11, fig_12, fig_13
-    )
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -1,11 +1,12 @@
 
-import pycountry  # to get ISO-3 codes for each country in the dataset
+import os
 import polars as pl
 import plotly.express as px
 import plotly.graph_objects as go
 import dash
-from dash import Dash, dcc, html, Input, Output
+from dash import Dash, dcc, html, Input, Output, State, ctx
 import dash_mantine_components as dmc
+from ff_components import add_template_relayout, add_relayout
 dash._dash_renderer._set_react_version('18.2.0')
 
 '''
@@ -51,6 +52,8 @@ choro_projections = sorted(['airy', 'aitoff', 'albers', 'august',
     'wagner4', 'wagner6', 'wiechel', 'winkel tripel','winkel3'
 ])
 
+iso_file = 'country_iso3.parquet'  # COUNTRY to ISO-3 code, saved next to Sales.csv
+
 attribution = (
     'Data source: ' + 
     '[Workout Wednesday](https://workout-wednesday.com/pbi-2025-w43/)'
@@ -76,7 +79,6 @@ df = (
 
 #----- CREATE GLOBAL LISTS -----------------------------------------------------
 countries = (sorted(df.unique('COUNTRY').get_column('COUNTRY').to_list()))
-iso_codes = [pycountry.countries.lookup(c).alpha_3 for c in countries]
 segments = (sorted(df.unique('SEGMENT').get_column('SEGMENT').to_list()))
 
 dict_country_color = dict(
@@ -85,17 +87,64 @@ dict_country_color = dict(
     )
 )
 #----- Make Dataframe of ISO-3 CODES by country, then join with df -------------
-df_iso = (   # join this with main df to get ISO-3 codes for each country
-    pl.DataFrame({
+def get_df_iso(countries):
+    ''' COUNTRY to ISO-3 table, pycountry is only loaded when it is rebuilt '''
+    if os.path.exists(iso_file):
+        df_iso = pl.read_parquet(iso_file)
+        if set(countries) <= set(df_iso['COUNTRY']):   # table is up to date
+            return df_iso
+    print('building ISO-3 table with pycountry')
+    import pycountry  # full country database, not needed once the table exists
+    df_iso = pl.DataFrame({
         'COUNTRY': countries,
-        'ISO-3': iso_codes
+        'ISO-3': [pycountry.countries.lookup(c).alpha_3 for c in countries]
     })
-)
+    df_iso.write_parquet(iso_file)
+    return df_iso
+
+df_iso = get_df_iso(countries) # join this with main df to get ISO-3 codes
 df = (
     df
     .join(df_iso, on='COUNTRY', how='left')
 )
 
+#----- MONTHLY SALES CUBE ------------------------------------------------------
+df_monthly = (   # monthly sales of each country and market segment
+    df
+    .sort('DATE')
+    .group_by_dynamic('DATE', every='1mo', group_by=['COUNTRY', 'SEGMENT'])
+    .agg(pl.col('SALES').sum())
+)
+df_country_month = ( # one column per country, null in months without sales
+    df_monthly
+    .pivot(
+        on='COUNTRY',
+        index='DATE',
+        values='SALES',
+        aggregate_function='sum',
+    )
+    .sort('DATE')
+    .select('DATE', *countries)
+)
+df_country_cum = (   # running totals, any subset of countries is a column slice
+    df_country_month
+    .with_columns(pl.col(countries).fill_null(0).cum_sum())
+)
+country_segment_cum = {  # {country: running totals by market segment}
+    country: (
+        df_country
+        .sort('DATE')
+        .select('DATE', pl.col(segments).fill_null(0).cum_sum())
+    )
+    for (country,), df_country
+    in (   # pivot all countries at once, so each has every segment column
+        df_monthly
+        .pivot(on='SEGMENT', index=['COUNTRY', 'DATE'], values='SALES')
+        .partition_by('COUNTRY', as_dict=True)
+        .items()
+    )
+}
+
 #----- FUNCTIONS ---------------------------------------------------------------
 def set_timeline_axis(fig):
     fig.update_xaxes(
@@ -112,10 +161,10 @@ def set_timeline_axis(fig):
     return fig
 
 def get_tl_country(country, template):
-    df_country_timeline = ( # group by dynamic to bin by month
-        df
-        .filter(pl.col('COUNTRY') == country)
-        .group_by_dynamic('DATE', every='1mo').agg(pl.col('SALES').sum())
+    df_country_timeline = ( # months with sales, from the monthly cube
+        df_country_month
+        .select('DATE', SALES = pl.col(country))
+        .drop_nulls()
     )
     mean_sales = df_country_timeline['SALES'].mean()
     df_country_timeline = (
@@ -180,20 +229,7 @@ def get_tl_country(country, template):
     return fig
 
 def get_cum_tl_countries(countries, template):
-    df_countries = ( # group by dynamic to bin by month
-        df
-        .filter(pl.col('COUNTRY').is_in(countries))
-        .pivot(
-            on='COUNTRY',
-            index='DATE',
-            values='SALES',
-            aggregate_function='sum',
-        )
-        .group_by_dynamic('DATE', every='1mo').agg(pl.col(countries).sum())
-        .with_columns([   # replace raw data with cumulative sums
-            pl.col(c).cum_sum().alias(c) for c in countries
-        ])
-    )
+    df_countries = df_country_cum.select('DATE', *countries)
 
     fig = go.Figure()    
     for country in countries:
@@ -223,21 +259,7 @@ def get_cum_tl_countries(countries, template):
     return fig
 
 def get_tl_country_breakdown(country, template):
-    df_country_groupby = ( # group by dynamic to bin by month
-        df
-        .filter(pl.col('COUNTRY') == country)
-        .pivot(
-            on='SEGMENT',
-            index='DATE',
-            values='SALES',
-            aggregate_function='sum',
-        )
-        .sort('DATE')
-        .group_by_dynamic('DATE', every='1mo').agg(pl.col(segments).sum())
-         .with_columns([   # replace raw data with cumulative sums
-            pl.col(c).cum_sum().alias(c) for c in segments
-        ])
-    )
+    df_country_groupby = country_segment_cum[country]
 
     fig = px.scatter(
         df_country_groupby,
@@ -401,16 +423,50 @@ app.layout =  dmc.MantineProvider([
     Input('pick-country', 'value'),
     Input('pick-countries', 'value'),
     Input('template', 'value'),
-    Input('choro_projection', 'value')
+    State('choro_projection', 'value'),
 )
 def callback(country, countries, template, choro_projection):
+    # projection changes are made in the browser, see add_relayout below.
+    # Figures with explicit trace colors change template in the browser too,
+    # the breakdown takes colors from the template and is redrawn
     if not isinstance(countries, list):  # if value is not a list, make it one
         countries = [countries]  
-    tl_country  = get_tl_country(country, template)
-    cum_tl_countries = get_cum_tl_countries(countries, template)
-    tl_country_breakdown = get_tl_country_breakdown(country, template)
-    choropleth = get_choropleth(countries, template, choro_projection)
+    if ctx.triggered_id == 'template':  # explicit color plots are relayouted
+        return (
+            dash.no_update,
+            dash.no_update,
+            get_tl_country_breakdown(country, template),
+            dash.no_update,
+        )
+    if ctx.triggered_id == 'pick-countries':  # single country plots unchanged
+        tl_country = dash.no_update
+        tl_country_breakdown = dash.no_update
+    else:
+        tl_country  = get_tl_country(country, template)
+        tl_country_breakdown = get_tl_country_breakdown(country, template)
+    if ctx.triggered_id == 'pick-country':    # multi-country plots unchanged
+        cum_tl_countries = dash.no_update
+        choropleth = dash.no_update
+    else:
+        cum_tl_countries = get_cum_tl_countries(countries, template)
+        choropleth = get_choropleth(countries, template, choro_projection)
 
     return tl_country, cum_tl_countries,tl_country_breakdown, choropleth
+
+add_template_relayout(   # figures with explicit trace colors
+    app,
+    'template',
+    ['tl_country', 'tl_cum_countries', 'choropleth'],
+    template_list
+)
+add_relayout(
+    app,
+    'choro_projection',
+    ['choropleth'],
+    {
+        'geo.projection.type': '{value}',
+        'title.subtitle.text': '{value} projection',
+    }
+)
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,6 @@
+'''
+Dash helpers shared by the weekly apps. Install once from the repo root with
+`pip install -e .`, then import them from any week folder.
+'''
+from .clientside_relayout import add_template_relayout, add_relayout
+from .map_component import get_map_figure, get_map_style_patch
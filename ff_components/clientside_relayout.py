@@ -0,0 +1,98 @@
+'''
+Clientside callbacks for switching the Plotly template or map projection of
+figures already in the browser with Plotly.relayout, without a server call.
+relayout only replaces layout.template, trace colors that Plotly Express took
+from the old template's colorway stay unless recolor=True. recolor gives trace
+i color i of the new colorway, the order Plotly Express uses for discrete
+colors. Figures with other template-driven colors need a server-side redraw.
+
+    from ff_components import add_template_relayout
+    add_template_relayout(app, 'template', ['graph_1', 'graph_2'], template_list)
+'''
+import json
+from plotly.colors import qualitative
+import plotly.io as pio
+from plotly.utils import PlotlyJSONEncoder
+from dash import Input
+
+#----- FUNCTIONS ---------------------------------------------------------------
+# relayout the plotly div inside each dcc.Graph; graphs not drawn yet are
+# skipped, and so is an empty update (e.g. a cleared dmc.Select)
+relayout_js = '''
+function(value) {
+    const update = %s;
+    if (!update) {
+        return;
+    }
+    for (const graph_id of %s) {
+        const graph = document.getElementById(graph_id);
+        const plot = graph && graph.querySelector('.js-plotly-plot');
+        if (plot) {
+            Plotly.relayout(plot, update);
+        }
+    }
+}
+'''
+
+# same as relayout_js, then each trace gets its color from the new colorway
+recolor_js = '''
+function(value) {
+    const update = %s;
+    const colorway = (update.template.layout || {}).colorway || %s;
+    for (const graph_id of %s) {
+        const graph = document.getElementById(graph_id);
+        const plot = graph && graph.querySelector('.js-plotly-plot');
+        if (plot) {
+            Plotly.relayout(plot, update);
+            const colors = plot.data.map((trace, i) => colorway[i %% colorway.length]);
+            Plotly.restyle(
+                plot,
+                {'marker.color': colors, 'line.color': colors},
+                plot.data.map((trace, i) => i)
+            );
+        }
+    }
+}
+'''
+
+def add_template_relayout(
+        app, control_id, graph_ids, template_list, recolor=False):
+    ''' switch the template of graph_ids in the browser when control_id changes '''
+    # plotly.js has no named templates, so the template contents are sent once
+    # with the callback and looked up by name in the browser
+    templates = {
+        name: pio.templates[name].to_plotly_json()
+        for name in template_list + [pio.templates.default]
+    }
+    update = (
+        f'((templates) => ({{template: templates[value] || '
+        f'templates[{json.dumps(pio.templates.default)}]}}))'
+        f'({json.dumps(templates, cls=PlotlyJSONEncoder)})'
+    )
+    if recolor:   # Plotly Express uses D3 colors when a template has none
+        callback_js = recolor_js % (
+            update, json.dumps(qualitative.D3), json.dumps(graph_ids)
+        )
+    else:
+        callback_js = relayout_js % (update, json.dumps(graph_ids))
+    app.clientside_callback(
+        callback_js,
+        Input(control_id, 'value'),
+        prevent_initial_call=True,
+    )
+
+def add_relayout(app, control_id, graph_ids, layout_updates):
+    '''
+    set layout attributes of graph_ids in the browser when control_id changes.
+    layout_updates maps plotly.js attribute strings to text, where {value} is
+    replaced by the control value, e.g. {'geo.projection.type': '{value}'}
+    '''
+    update = 'value && {' + ', '.join(
+        f'{json.dumps(attribute)}: {json.dumps(text)}.replace("{{value}}", value)'
+        for attribute, text in layout_updates.items()
+    ) + '}'
+    app.clientside_callback(
+        relayout_js % (update, json.dumps(graph_ids)),
+        Input(control_id, 'value'),
+        prevent_initial_call=True,
+    )
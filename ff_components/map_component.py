@@ -0,0 +1,33 @@
+'''
+Scatter map figures shared by the weekly Dash apps. A map figure is built once
+per key (a zip code, a state, ...) and kept as a plain dict, so later requests
+reuse the trace payload instead of rebuilding it with px.scatter_map. Map style
+changes are sent as a layout Patch, the traces already in the browser stay.
+
+    from ff_components import get_map_figure, get_map_style_patch
+    if ctx.triggered_id == 'map-style':
+        return get_map_style_patch(map_style)
+    return get_map_figure(zip_code, lambda: get_scatter_map(zip_code), map_style)
+'''
+from dash import Patch
+
+#----- GLOBALS -----------------------------------------------------------------
+map_cache = {}   # {key: figure dict}, filled on first use of each key
+
+#----- FUNCTIONS ---------------------------------------------------------------
+def get_map_figure(key, build, map_style):
+    ''' map figure for key with map_style, build() is only called once per key '''
+    if key not in map_cache:
+        map_cache[key] = build().to_dict()
+    fig = map_cache[key]
+    layout = fig['layout']
+    return {   # new layout dict with the style, the cached traces are shared
+        'data': fig['data'],
+        'layout': {**layout, 'map': {**layout.get('map', {}), 'style': map_style}},
+    }
+
+def get_map_style_patch(map_style):
+    ''' layout delta that changes only the style of a map already drawn '''
+    patched_fig = Patch()
+    patched_fig['layout']['map']['style'] = map_style
+    return patched_fig
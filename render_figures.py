@@ -0,0 +1,164 @@
+'''
+Batch render of the static (non-Dash) weekly figure scripts.
+Finds every Week_* script that calls .show() or .write_html() and is not a
+Dash app, runs the scripts in parallel on all CPU cores and saves each figure
+the script shows as html and json in rendered/<week folder>/. A script is
+skipped when neither its code nor its input files have changed since the last
+render, except scripts that read their data from a URL, which are always
+rendered. Use --force to render everything.
+
+    python render_figures.py [--force]
+'''
+import concurrent.futures
+import hashlib
+import json
+import os
+import re
+import runpy
+import sys
+
+#----- GLOBALS -----------------------------------------------------------------
+repo_dir = os.path.dirname(os.path.abspath(__file__))
+output_dir = os.path.join(repo_dir, 'rendered')
+manifest_path = os.path.join(output_dir, 'manifest.json')
+figure_call = re.compile(r'\.show\(\)|\.write_html\(')
+# files the scripts read, anything else in a week folder is not an input
+data_extensions = ('.csv', '.tsv', '.parquet', '.xlsx', '.xls', '.json')
+# file names the scripts write, e.g. fig.write_html('scatter_matrix.html')
+output_call = re.compile(r'\.(?:write|to)_\w+\(\s*[\'"]([^\'"]+)[\'"]')
+# uncommented url of a data file, e.g. pl.scan_csv('https://raw.github...')
+remote_input = re.compile(
+    r'^[^#\n]*(?<!=)[\'"]https?://'
+    r'(?:raw\.githubusercontent\.com/|[^\'"]*\.(?:csv|tsv|parquet|xlsx|xls|json)\b)',
+    re.M
+)
+
+#----- FUNCTIONS ---------------------------------------------------------------
+def find_figure_scripts():
+    ''' return paths of weekly scripts that build figures outside of Dash '''
+    scripts = []
+    for week_dir in sorted(os.listdir(repo_dir)):
+        if not week_dir.startswith('Week_'):
+            continue
+        for file_name in sorted(os.listdir(os.path.join(repo_dir, week_dir))):
+            if not file_name.endswith('.py'):
+                continue
+            path = os.path.join(repo_dir, week_dir, file_name)
+            with open(path, encoding='utf-8', errors='ignore') as f:
+                source = f.read()
+            if figure_call.search(source) and 'Dash(' not in source:
+                scripts.append(path)
+    return scripts
+
+def get_input_files(script):
+    ''' return data files in the script's folder that the script reads '''
+    with open(script, encoding='utf-8', errors='ignore') as f:
+        source = f.read()
+    week_dir = os.path.dirname(script)
+    output_files = set(output_call.findall(source))
+    return sorted(
+        os.path.join(week_dir, file_name)
+        for file_name in os.listdir(week_dir)
+        if file_name.endswith(data_extensions)
+        and file_name in source
+        and file_name not in output_files
+    )
+
+def has_remote_input(script):
+    ''' True when the script reads data from a url, which is not hashed '''
+    with open(script, encoding='utf-8', errors='ignore') as f:
+        return remote_input.search(f.read()) is not None
+
+def get_script_hash(script):
+    ''' return hash of the script code and of its input files '''
+    sha = hashlib.sha1()
+    for path in [script] + get_input_files(script):
+        with open(path, 'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+def render_script(script):
+    ''' run one script, save every figure it shows, return the file names '''
+    import plotly.io as pio
+    from plotly.basedatatypes import BaseFigure
+    figures = []
+    # capture figures instead of opening a browser or writing into the week
+    # folder, where written html would show up as a changed file on every run
+    pio.show = lambda fig, *args, **kwargs: figures.append(fig)
+    BaseFigure.show = lambda fig, *args, **kwargs: figures.append(fig)
+    BaseFigure.write_html = lambda fig, *args, **kwargs: figures.append(fig)
+    week_dir, file_name = os.path.split(script)
+    os.chdir(week_dir)   # scripts read their data with relative paths
+    runpy.run_path(script, run_name='__main__')
+
+    script_output_dir = os.path.join(output_dir, os.path.basename(week_dir))
+    os.makedirs(script_output_dir, exist_ok=True)
+    script_name = os.path.splitext(file_name)[0]
+    old_output = re.compile(re.escape(script_name) + r'_\d+\.(?:html|json)')
+    for output_file in os.listdir(script_output_dir):  # figures of older runs
+        if old_output.fullmatch(output_file):
+            os.remove(os.path.join(script_output_dir, output_file))
+    figure_names = []
+    for fig_index, fig in enumerate(figures, start=1):
+        figure_name = f'{script_name}_{fig_index:02d}'
+        pio.write_html(
+            fig,
+            os.path.join(script_output_dir, f'{figure_name}.html'),
+            include_plotlyjs='cdn'
+        )
+        pio.write_json(
+            fig, os.path.join(script_output_dir, f'{figure_name}.json')
+        )
+        figure_names.append(figure_name)
+    return figure_names
+
+def is_up_to_date(script, script_hash, manifest):
+    ''' True when the script was rendered from the same code and inputs '''
+    entry = manifest.get(os.path.relpath(script, repo_dir))
+    if entry is None or entry['hash'] != script_hash:
+        return False
+    script_output_dir = os.path.join(
+        output_dir, os.path.basename(os.path.dirname(script))
+    )
+    return all(
+        os.path.exists(os.path.join(script_output_dir, f'{name}.html'))
+        for name in entry['figures']
+    )
+
+def main(force=False):
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    script_hashes = {script: get_script_hash(script) for script in find_figure_scripts()}
+    to_render = [
+        script for script, script_hash in script_hashes.items()
+        if force
+        or has_remote_input(script)
+        or not is_up_to_date(script, script_hash, manifest)
+    ]
+    print(f'{len(script_hashes)} figure scripts, {len(to_render)} to render')
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        futures = {pool.submit(render_script, script): script for script in to_render}
+        for future in concurrent.futures.as_completed(futures):
+            script = futures[future]
+            script_name = os.path.relpath(script, repo_dir)
+            try:
+                figure_names = future.result()
+            except Exception as e:
+                print(f'FAILED {script_name}: {e}')
+                continue
+            manifest[script_name] = {
+                'hash': script_hashes[script],
+                'figures': figure_names,
+            }
+            print(f'rendered {script_name}: {len(figure_names)} figures')
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+if __name__ == '__main__':
+    main(force='--force' in sys.argv)